@@ -1,10 +1,43 @@
 import tkinter as tk
-from tkinter import filedialog, messagebox
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+from tkinter import filedialog, messagebox, ttk
 import numpy as np
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from grading_core import (DEFAULT_HANDLE_TARGETS, DEFAULT_HANDLES, HANDLE_GRADES, GradingScheme, MarksIndex, ScenarioBook,
+                          StudentIndex, delta_size, diff_marks, grade_marks, grade_table_rows, reindex_marks)
+from grading_perf import StageTimer
+
+STAGE_TIMER = StageTimer()
+
+
+
+# matplotlib and the pandas I/O stack (grading_io) are most of the startup
+# time. They are imported where first used, and preloaded on the worker
+# thread once the window is up.
+def load_plotting():
+    from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+    from matplotlib.figure import Figure
+    return Figure, FigureCanvasTkAgg
+
+
+def preload_modules():
+    import grading_io
+    load_plotting()
+
+
+def timed_canvas(figure, master, stage='draw'):
+    # draw_idle defers the Agg render to Tk idle time, so time it where it happens.
+    _, FigureCanvasTkAgg = load_plotting()
+    canvas = FigureCanvasTkAgg(figure, master=master)
+    draw = canvas.draw
+
+    def timed_draw():
+        with STAGE_TIMER.stage(stage):
+            draw()
+    canvas.draw = timed_draw
+    return canvas
 
 class MultiHandleSliderApp:
     def __init__(self, root):
@@ -12,6 +45,7 @@ class MultiHandleSliderApp:
         self.root.title("Grading Tool")
         self.root.configure(bg='#FFFFFF')
         self.data = None
+        self.marks_frame = None
         self.criteria = {}  
         self.filePath = None
         self.average_value = None
@@ -20,10 +54,21 @@ class MultiHandleSliderApp:
         self.is_dragging = False
         self.update_after_id = None
 
+        # File I/O and grading run on one background thread; results come back
+        # to the Tk thread through root.after polling.
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.task = None
+        self.task_done = None
+        self.task_error = None
+        self.task_cancel = None
+        self.task_progress = 0.0
+
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
         self.heading_label = tk.Label(root, text="Grading Tool", font=("open sans", 28, "bold"), bg='#FFFFFF')
         self.heading_label.pack(pady=10)
 
-        self.load_button = tk.Button(self.root, text="Load Excel File", command=self.load_data, font=("open sans", 12, "bold"))
+        self.load_button = tk.Button(self.root, text="Load Marks File", command=self.load_data, font=("open sans", 12, "bold"))
         self.load_button.pack(pady=5)
 
         file_frame = tk.Frame(root,bg='#FFFFFF')
@@ -34,7 +79,23 @@ class MultiHandleSliderApp:
         self.output_file_entry.grid(row=1, column=1, padx=10, pady=10)
         tk.Button(file_frame, text="Save As", command=self.save_file,font=("open sans", 12, "bold")).grid(row=1, column=2, padx=10, pady=10)
 
-        tk.Button(file_frame, text="Run Grading", command=self.run_grading,font=("open sans", 12, "bold")).grid(row=2, column=1, padx=10, pady=20)
+        self.run_button = tk.Button(file_frame, text="Run Grading", command=self.run_grading,font=("open sans", 12, "bold"))
+        self.run_button.grid(row=2, column=1, padx=10, pady=20)
+        self.stream_button = tk.Button(file_frame, text="Stream Large File", command=self.stream_grading, font=("open sans", 12, "bold"))
+        self.stream_button.grid(row=2, column=2, padx=10, pady=20)
+        # Watch mode: reload the marks file whenever it is saved again.
+        self.watch_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(file_frame, text="Watch File", variable=self.watch_var, command=self.toggle_watch, font=("open sans", 12)).grid(row=2, column=3, padx=10, pady=20)
+        self.watch_after_id = None
+        self.sheet_names = None
+        self.file_signature = None
+
+        self.status_label = tk.Label(file_frame, text="", font=("open sans", 10), bg='#FFFFFF')
+        self.status_label.grid(row=3, column=0, padx=10)
+        self.progress_bar = ttk.Progressbar(file_frame, mode='indeterminate', length=400)
+        self.progress_bar.grid(row=3, column=1, padx=10)
+        self.cancel_button = tk.Button(file_frame, text="Cancel", command=self.cancel_task, state=tk.DISABLED, font=("open sans", 12, "bold"))
+        self.cancel_button.grid(row=3, column=2, padx=10)
 
         self.scroll_canvas = tk.Canvas(self.root,bg='#FFFFFF')
         self.scrollbar = tk.Scrollbar(self.root, orient="vertical", command=self.scroll_canvas.yview)
@@ -55,13 +116,30 @@ class MultiHandleSliderApp:
         self.plot_frame = tk.Frame(self.main_frame,bg='#FFFFFF')
         self.plot_frame.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
 
-        self.figure, self.ax = plt.subplots(figsize=(12, 6), dpi=100)
-        self.plot_canvas = FigureCanvasTkAgg(self.figure, master=self.plot_frame)
-        self.plot_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True)
-
-        self.table_figure, self.table_ax = plt.subplots(figsize=(10, 2), dpi=100)
-        self.table_ax.axis('tight')
-        self.table_ax.axis('off')
+        # The histogram is built with the first loaded file.
+        self.figure = self.ax = self.plot_canvas = None
+        self.plot_placeholder = tk.Label(self.plot_frame, text="Load a marks file to see the histogram.", font=("open sans", 12), bg='#FFFFFF')
+        self.plot_placeholder.pack(fill=tk.BOTH, expand=True, pady=40)
+
+        # Native grade table built once; drag ticks only update changed rows.
+        table_style = ttk.Style(self.root)
+        table_style.configure("Grades.Treeview", font=("open sans", 12, "bold"), rowheight=40)
+        table_style.configure("Grades.Treeview.Heading", font=("open sans", 12, "bold"))
+        table_columns = ['Grade', 'Range of Grade', 'No. of Students', '%age of Students', '%age Consecutive Grades', 'Mean Marks']
+        self.table = ttk.Treeview(self.table_frame, columns=table_columns, show='headings', height=len(HANDLE_GRADES),
+                                  style="Grades.Treeview", selectmode='none')
+        for col in table_columns:
+            self.table.heading(col, text=col)
+            self.table.column(col, anchor=tk.CENTER, width=150 if col != 'Grade' else 70)
+        self.table.pack(fill=tk.X)
+        self.table_values = {}
+        self.summary_label = tk.Label(self.table_frame, text="", font=("open sans", 12, "bold"))
+        self.summary_label.pack(pady=5)
+
+        # Per-section distribution, shown when a workbook with several sheets is loaded.
+        self.section_indexes = {}
+        self.section_table = None
+        self.section_values = {}
 
         self.slider_frame = tk.Frame(self.plot_frame)
         self.slider_frame.pack(fill=tk.X, padx=50)
@@ -83,7 +161,7 @@ class MultiHandleSliderApp:
         self.value_entries = []
         handle_spacing = (self.slider_width - 100) / (self.num_handles - 1)
 
-        default_values = [0, 15, 25, 40, 50, 65, 75, 85, 95]
+        default_values = DEFAULT_HANDLES
 
         self.update_after_id = None
         self.is_dragging = False
@@ -113,8 +191,87 @@ class MultiHandleSliderApp:
         self.diff_label = tk.Label(self.slider_frame, text="", font=("open sans", 16,"bold"))
         self.diff_label.pack(pady=5)
 
-        self.sorted_marks = []
+        self.snap_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.slider_frame, text="Snap handles to nearest gap", variable=self.snap_var, font=("open sans", 12)).pack(pady=5)
+
+        # Target distribution: typing a share refits handles 1-8 to the marks.
+        target_frame = tk.Frame(self.slider_frame)
+        target_frame.pack(pady=5)
+        tk.Label(target_frame, text="Target %:", font=("open sans", 12, "bold")).grid(row=1, column=0, padx=5)
+        self.target_entries = []
+        for i, (name, share) in enumerate(zip(self.hand_name, DEFAULT_HANDLE_TARGETS)):
+            tk.Label(target_frame, text=name, font=("open sans", 10)).grid(row=0, column=i + 1)
+            entry = tk.Entry(target_frame, width=5, bg='#FFFFFF')
+            entry.grid(row=1, column=i + 1, padx=2)
+            entry.insert(0, str(share))
+            entry.bind("<KeyRelease>", lambda _: self.fit_to_targets(live=True))
+            self.target_entries.append(entry)
+        tk.Label(target_frame, text="Gap window ±%", font=("open sans", 10)).grid(row=0, column=10, padx=5)
+        self.window_entry = tk.Entry(target_frame, width=5, bg='#FFFFFF')
+        self.window_entry.grid(row=1, column=10, padx=5)
+        self.window_entry.insert(0, "1")
+        self.window_entry.bind("<KeyRelease>", lambda _: self.fit_to_targets(live=True))
+        tk.Button(target_frame, text="Fit to Targets", command=self.fit_to_targets, font=("open sans", 12, "bold")).grid(row=0, column=11, rowspan=2, padx=10)
+
+        # Named what-if scenarios, compared from the sorted marks without regrading.
+        scenario_frame = tk.Frame(self.slider_frame)
+        scenario_frame.pack(pady=5)
+        tk.Label(scenario_frame, text="Scenario:", font=("open sans", 12, "bold")).grid(row=0, column=0, padx=5)
+        self.scenario_name_entry = tk.Entry(scenario_frame, width=15, bg='#FFFFFF')
+        self.scenario_name_entry.grid(row=0, column=1, padx=5)
+        tk.Button(scenario_frame, text="Save Scenario", command=self.save_scenario, font=("open sans", 12, "bold")).grid(row=0, column=2, padx=5)
+        tk.Label(scenario_frame, text="Compare", font=("open sans", 12, "bold")).grid(row=0, column=3, padx=5)
+        self.compare_from = ttk.Combobox(scenario_frame, width=12, state='readonly')
+        self.compare_from.grid(row=0, column=4, padx=5)
+        tk.Label(scenario_frame, text="→", font=("open sans", 12, "bold")).grid(row=0, column=5)
+        self.compare_to = ttk.Combobox(scenario_frame, width=12, state='readonly')
+        self.compare_to.grid(row=0, column=6, padx=5)
+        tk.Button(scenario_frame, text="Compare", command=self.compare_scenarios, font=("open sans", 12, "bold")).grid(row=0, column=7, padx=5)
+        tk.Button(scenario_frame, text="Changed Students", command=self.show_changed_students, font=("open sans", 12, "bold")).grid(row=0, column=8, padx=5)
+
+        scenario_columns = ['Scenario'] + [grade.strip() for grade in HANDLE_GRADES] + ['No Grade', 'Mean GPA']
+        self.scenario_table = ttk.Treeview(self.slider_frame, columns=scenario_columns, show='headings', height=4, selectmode='none')
+        for col in scenario_columns:
+            self.scenario_table.heading(col, text=col)
+            self.scenario_table.column(col, anchor=tk.CENTER, width=120 if col == 'Scenario' else 70)
+        self.scenario_table.pack(fill=tk.X, pady=5)
+        self.scenario_diff_label = tk.Label(self.slider_frame, text="", justify=tk.LEFT, font=("open sans", 12))
+        self.scenario_diff_label.pack(pady=5)
+        self.scenario_schemes = {}
+        self.scenario_book = None
+        self.scenario_diff = None
+
+        # Per-student queries: a Roll No lookup, students near a cutoff and the top students.
+        lookup_frame = tk.Frame(self.slider_frame)
+        lookup_frame.pack(pady=5)
+        tk.Label(lookup_frame, text="Roll No:", font=("open sans", 12, "bold")).grid(row=0, column=0, padx=5)
+        self.roll_entry = tk.Entry(lookup_frame, width=15, bg='#FFFFFF')
+        self.roll_entry.grid(row=0, column=1, padx=5)
+        self.roll_entry.bind('<Return>', lambda event: self.find_student())
+        tk.Button(lookup_frame, text="Find", command=self.find_student, font=("open sans", 12, "bold")).grid(row=0, column=2, padx=5)
+        tk.Label(lookup_frame, text="Within ±", font=("open sans", 12, "bold")).grid(row=0, column=3, padx=5)
+        self.margin_entry = tk.Entry(lookup_frame, width=5, bg='#FFFFFF')
+        self.margin_entry.insert(0, "0.5")
+        self.margin_entry.grid(row=0, column=4, padx=5)
+        tk.Button(lookup_frame, text="Borderline Students", command=self.show_borderline, font=("open sans", 12, "bold")).grid(row=0, column=5, padx=5)
+        tk.Label(lookup_frame, text="Top", font=("open sans", 12, "bold")).grid(row=0, column=6, padx=5)
+        self.top_entry = tk.Entry(lookup_frame, width=5, bg='#FFFFFF')
+        self.top_entry.insert(0, "10")
+        self.top_entry.grid(row=0, column=7, padx=5)
+        tk.Button(lookup_frame, text="Top Students", command=self.show_top, font=("open sans", 12, "bold")).grid(row=0, column=8, padx=5)
+        self.student_label = tk.Label(self.slider_frame, text="", font=("open sans", 12))
+        self.student_label.pack(pady=5)
+        self.student_index = None
+
+        self.hud_var = tk.BooleanVar(value=False)
+        tk.Checkbutton(self.slider_frame, text="Show frame times", variable=self.hud_var, command=self.toggle_hud, font=("open sans", 12)).pack(pady=5)
+        tk.Button(self.slider_frame, text="Save Timing Trace", command=self.save_trace, font=("open sans", 12, "bold")).pack(pady=5)
+        self.hud_label = tk.Label(self.plot_frame, text="", justify=tk.LEFT, font=("courier", 10), bg='#000000', fg='#00ff00')
+        self.hud_after_id = None
+
+        self.marks_index = None
         self.update_histogram()
+        self.root.after_idle(self.executor.submit, preload_modules)
 
     def set_default_handle_positions(self, default_values):
         handle_spacing = (self.slider_width - 100) / (self.num_handles - 1)
@@ -136,71 +293,381 @@ class MultiHandleSliderApp:
         self.scroll_canvas.configure(scrollregion=self.scroll_canvas.bbox("all"))
 
     def load_data(self):
-        self.filePath = filedialog.askopenfilename(title="Select Excel File", filetypes=[("Excel files", "*.xlsx *.xls")])
-        if self.filePath:
-            self.data = self.read_excel_file(self.filePath)
-            self.average_value = self.data.mean()
-            if self.data is not None:
-                self.sorted_marks = sorted(self.data, reverse=True)    
-                self.update_histogram()
-
-    def read_excel_file(self, file_path):
-        try:
-            df = pd.read_excel(file_path)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to read the Excel file: {e}")
+        from grading_io import MARKS_FILE_TYPES, detect_format, file_signature, list_sheets
+        file_path = filedialog.askopenfilename(title="Select Marks File", filetypes=[("Marks files", " ".join(f"*{ext}" for ext in MARKS_FILE_TYPES))])
+        if not file_path:
             return
-        if 'Marks' not in df.columns:
-            messagebox.showerror("Error", "The Excel file must contain a 'Marks' column.")
+
+        sheet_names = None
+        if detect_format(file_path) == 'xlsx':
+            try:
+                sheets = list_sheets(file_path)
+            except Exception as e:
+                messagebox.showerror("Error", f"Failed to read the marks file: {e}")
+                return
+            if len(sheets) > 1:
+                sheet_names = self.ask_sheets(sheets)
+                if not sheet_names:
+                    return
+
+        # Taken before reading, so a save during the load is picked up by watch mode.
+        signature = file_signature(file_path)
+        self.start_task(f"Loading {os.path.basename(file_path)}...", lambda should_stop, progress: self.read_marks_file(file_path, sheet_names),
+                        lambda result: self.on_data_loaded(file_path, result, sheet_names, signature), "Failed to read the marks file")
+
+    def ask_sheets(self, sheets):
+        # Workbooks with a sheet per section: pick which sections to grade.
+        dialog = tk.Toplevel(self.root)
+        dialog.title("Select Sections")
+        dialog.transient(self.root)
+        tk.Label(dialog, text="Sheets to load:", font=("open sans", 12, "bold")).pack(padx=10, pady=5)
+        listbox = tk.Listbox(dialog, selectmode=tk.MULTIPLE, height=min(len(sheets), 15), exportselection=False)
+        for sheet in sheets:
+            listbox.insert(tk.END, sheet)
+        listbox.select_set(0, tk.END)
+        listbox.pack(fill=tk.BOTH, expand=True, padx=10)
+
+        selected = []
+        def confirm():
+            selected.extend(sheets[i] for i in listbox.curselection())
+            dialog.destroy()
+        tk.Button(dialog, text="Load", command=confirm, font=("open sans", 12, "bold")).pack(pady=10)
+
+        dialog.grab_set()
+        self.root.wait_window(dialog)
+        return selected
+
+    def on_data_loaded(self, file_path, result, sheet_names=None, signature=None):
+        df, marks_index, section_indexes, student_index = result
+        self.filePath = file_path
+        self.sheet_names = sheet_names
+        self.file_signature = signature
+        self.marks_frame = df
+        self.student_index = student_index
+        self.section_indexes = section_indexes
+        self.build_section_table()
+        self.set_data(df['Marks'], marks_index)
+
+    def set_data(self, data, marks_index=None):
+        self.build_plot()
+        self.data = data
+        self.marks_index = marks_index if marks_index is not None else MarksIndex(self.data, with_order=True)
+        self.show_summary()
+        self.scenario_book = ScenarioBook(self.marks_index)
+        for name, scheme in self.scenario_schemes.items():
+            self.scenario_book.add(name, scheme)
+        self.scenario_diff = None
+        self.refresh_scenarios()
+        self.build_mark_strip()
+        self.build_histogram()
+        self.update_histogram()
+
+    def build_mark_strip(self):
+        # One rug line per occupied 2px column instead of one oval per student,
+        # drawn only when the data changes so the canvas item count stays bounded.
+        self.slider_canvas.delete("mark_strip")
+        track_width = self.slider_width - 100
+        counts, edges = np.histogram(self.marks_index.sorted, bins=track_width // 2, range=(self.min_value, self.max_value))
+        if not counts.any():
             return
-        return df['Marks']
+        heights = 2 + 8 * np.log1p(counts) / np.log1p(counts.max())
+        for count, left, height in zip(counts, edges, heights):
+            if count:
+                x_position = 50 + (left / self.max_value) * track_width + 1
+                self.slider_canvas.create_line(x_position, 17, x_position, 17 - height, width=2, fill='red', tags="mark_strip")
+
+    @STAGE_TIMER.timed('load')
+    def read_marks_file(self, file_path, sheet_names=None):
+        # Runs on the worker thread; the sorted indexes are built there too.
+        df, frames = self.read_frame(file_path, sheet_names)
+        marks_index = MarksIndex(df['Marks'], with_order=True)
+        return df, marks_index, self.index_sections(frames), self.index_students(df, marks_index)
+
+    def read_frame(self, file_path, sheet_names=None):
+        # Several sheets are parsed in parallel and kept as sections.
+        from grading_io import combine_sections, load_marks_file, load_sheets
+        if not sheet_names:
+            df = load_marks_file(file_path)
+            if 'Marks' not in df.columns:
+                raise ValueError("The marks file must contain a 'Marks' column.")
+            return df, {}
+
+        frames = load_sheets(file_path, sheet_names)
+        for name, frame in frames.items():
+            if 'Marks' not in frame.columns:
+                raise ValueError(f"Sheet '{name}' must contain a 'Marks' column.")
+        return combine_sections(frames), frames
+
+    def index_sections(self, frames):
+        return {name: MarksIndex(frame['Marks']) for name, frame in frames.items()}
+
+    def index_students(self, df, marks_index):
+        return StudentIndex(df['Marks'], df['Roll No'] if 'Roll No' in df.columns else None, marks_index)
 
     def save_file(self):
-        file_path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel files", "*.xlsx")])
+        file_path = filedialog.asksaveasfilename(defaultextension=".xlsx", filetypes=[("Excel files", "*.xlsx"), ("CSV files", "*.csv"), ("Parquet files", "*.parquet")])
         if file_path:
             self.output_file_entry.delete(0, tk.END)
             self.output_file_entry.insert(0, file_path)
 
     def run_grading(self):
-        input_file = self.filePath
         output_file = self.output_file_entry.get()
 
-        if not os.path.exists(input_file):
-            messagebox.showerror("Error", "The selected input file does not exist.")
+        if self.marks_frame is None:
+            messagebox.showerror("Error", "Please load a marks file first.")
+            return
+
+        if not output_file:
+            messagebox.showerror("Error", "Please select an output file.")
             return
 
+        self.update_grades(output_file)
+
+    def update_grades(self, output_file):
+        # Grades the frame loaded by load_data instead of reading the input again.
+        # The scheme is captured now so the handles stay free while saving.
+        df = self.marks_frame
+        scheme = GradingScheme.from_ranges(self.criteria)
+        output_format = os.path.splitext(output_file)[1].lower().lstrip('.') or 'xlsx'
+
+        @STAGE_TIMER.timed('grade + save')
+        def grade_and_save(should_stop, progress):
+            from grading_io import write_frame
+            graded = df.assign(Grade=grade_marks(df['Marks'], scheme))
+            write_frame(graded, output_file, output_format, should_stop=should_stop, progress=progress,
+                        split_by='Section' if 'Section' in graded.columns else None)
+
+        self.start_task(f"Saving {os.path.basename(output_file)}...", grade_and_save,
+                        lambda _: messagebox.showinfo("Success", f"Grades updated and saved to {output_file}"),
+                        "Failed to save the graded file", determinate=True)
+
+    def stream_grading(self):
+        # Grades a file too large to load, chunk by chunk, with the current
+        # handles; the streamed file's counts open in their own window.
+        output_file = self.output_file_entry.get()
         if not output_file:
             messagebox.showerror("Error", "Please select an output file.")
             return
+        input_file = filedialog.askopenfilename(title="Select Large Marks File", filetypes=[("Marks files", "*.xlsx *.csv *.parquet")])
+        if not input_file:
+            return
 
-        self.update_grades(input_file, output_file)
+        # The table ranges only exist once a file is loaded, so grade from the handles.
+        bin_edges = self.get_bin_edges()
+        scheme = GradingScheme.from_handles(bin_edges[:-1], self.max_value)
+        output_format = os.path.splitext(output_file)[1].lower().lstrip('.') or 'xlsx'
+
+        @STAGE_TIMER.timed('stream grade')
+        def grade_in_chunks(should_stop, progress):
+            from grading_io import estimate_rows, stream_grade
+            total = estimate_rows(input_file)
+            return stream_grade(input_file, scheme, output_file, output_format, bin_edges=bin_edges, should_stop=should_stop,
+                                progress=(lambda rows: progress(min(rows / total, 1.0))) if total else None)
+
+        self.start_task(f"Streaming {os.path.basename(input_file)}...", grade_in_chunks,
+                        lambda tally: self.show_tally(tally, input_file, output_file), "Failed to grade the file", determinate=True)
+
+    def show_tally(self, tally, input_file, output_file):
+        # Grade counts of a streamed file in a separate window; the main table
+        # keeps describing the loaded file.
+        dialog = tk.Toplevel(self.root)
+        dialog.title(f"Streamed Grades: {os.path.basename(input_file)}")
+        tk.Label(dialog, text=f"Graded {tally.students:,} students (average {tally.mean:.2f}) and saved to {output_file}",
+                 font=("open sans", 12, "bold")).pack(padx=10, pady=10)
+        columns = list(self.table['columns'][:5])
+        listing = ttk.Treeview(dialog, columns=columns, show='headings', height=len(HANDLE_GRADES))
+        for col in columns:
+            listing.heading(col, text=col)
+            listing.column(col, anchor=tk.CENTER, width=150 if col != 'Grade' else 70)
+        for values in grade_table_rows(tally.bin_edges, tally.bin_counts):
+            listing.insert('', tk.END, values=values)
+        listing.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+    def toggle_watch(self):
+        if not self.watch_var.get():
+            if self.watch_after_id:
+                self.root.after_cancel(self.watch_after_id)
+                self.watch_after_id = None
+            return
+        if self.marks_frame is None:
+            messagebox.showerror("Error", "Please load a marks file first.")
+            self.watch_var.set(False)
+            return
+        self.watch_after_id = self.root.after(1000, self.poll_file)
+
+    def poll_file(self):
+        # Checks the loaded file once a second; a save starts a background
+        # reload unless another task is running.
+        from grading_io import file_signature
+        self.watch_after_id = self.root.after(1000, self.poll_file)
+        if self.task is not None or file_signature(self.filePath) in (None, self.file_signature):
+            return
 
-    def update_grades(self, input_file, output_file):
-        try:
-            df = pd.read_excel(input_file)
-        except Exception as e:
-            messagebox.showerror("Error", f"Failed to read the Excel file: {e}")
+        file_path, sheet_names, output_file = self.filePath, self.sheet_names, self.output_file_entry.get()
+        old_df, old_index, old_students, scheme = self.marks_frame, self.marks_index, self.student_index, self.current_scheme()
+        self.start_task(f"Reloading {os.path.basename(file_path)}...",
+                        lambda should_stop, progress: self.reload_marks_file(file_path, sheet_names, old_df, old_index, old_students, scheme, output_file),
+                        self.on_data_reloaded, "Failed to reload the marks file")
+
+    @STAGE_TIMER.timed('reload')
+    def reload_marks_file(self, file_path, sheet_names, old_df, old_index, old_students, scheme, output_file):
+        # Runs on the worker thread: rereads the file once it has finished
+        # saving, diffs it against the loaded frame by Roll No and moves only
+        # the changed marks in the index. With an output file set, the changed
+        # students are also saved next to it as a delta file.
+        from grading_io import delta_frame, delta_path, settled_signature, write_frame
+        signature = settled_signature(file_path)
+        if signature is None:
+            return None
+        df, frames = self.read_frame(file_path, sheet_names)
+        delta = diff_marks(old_df.get('Roll No'), old_df['Marks'], df.get('Roll No'), df['Marks'])
+        marks_index = reindex_marks(old_index, df['Marks'], delta)
+        if delta['aligned']:
+            student_index = old_students.with_marks(df['Marks'], marks_index)
+        else:
+            student_index = self.index_students(df, marks_index)
+
+        delta_file = None
+        if output_file and delta_size(delta):
+            delta_file = delta_path(output_file)
+            write_frame(delta_frame(old_df, df, delta, scheme), delta_file, os.path.splitext(output_file)[1].lower().lstrip('.') or 'xlsx')
+        return signature, df, marks_index, self.index_sections(frames), student_index, delta, delta_file
+
+    def on_data_reloaded(self, result):
+        if result is None:
+            return
+        signature, df, marks_index, section_indexes, student_index, delta, delta_file = result
+        self.file_signature = signature
+        # Stored even without mark changes: names, roll numbers or row order
+        # may have changed, and Run Grading writes this frame.
+        self.marks_frame = df
+        self.data = df['Marks']
+        self.marks_index = marks_index
+        self.student_index = student_index
+        self.section_indexes = section_indexes
+        self.scenario_book = ScenarioBook(marks_index)
+        for name, scheme in self.scenario_schemes.items():
+            self.scenario_book.add(name, scheme)
+        self.scenario_diff = None
+        self.refresh_scenarios()
+        if not delta_size(delta):
+            self.status_label.config(text="Saved again, no mark changes")
+            return
+
+        self.show_summary()
+        self.build_mark_strip()
+
+        # Same edges, new marks: the bars and table rows are updated in place.
+        self.bin_positions = self.marks_index.bin_positions(self.bin_edges)
+        counts = np.diff(self.bin_positions)
+        for bar, count in zip(self.bars, counts):
+            bar.set_height(count)
+        self.average_line.set_xdata([self.average_value, self.average_value])
+        self.average_line.set_label(f'Average: {self.average_value:.2f}')
+        self.ax.legend()
+        self.ax.relim()
+        self.ax.autoscale_view()
+        self.update_table(self.bin_edges, counts, self.bin_means())
+        self.update_section_table()
+        self.plot_canvas.draw_idle()
+
+        summary = f"Reloaded: {len(delta['changed'])} changed, {len(delta['added'])} added, {len(delta['removed'])} removed"
+        self.status_label.config(text=summary + (f"; delta saved to {os.path.basename(delta_file)}" if delta_file else ""))
+
+    def start_task(self, description, work, on_done, error_message, determinate=False):
+        if self.task is not None:
+            messagebox.showwarning("Busy", "Please wait for the current task to finish or cancel it.")
             return
 
-        if 'Marks' not in df.columns:
-            messagebox.showerror("Error", "The Excel file must contain a 'Marks' column.")
+        self.task_cancel = threading.Event()
+        self.task_progress = 0.0
+        self.task_done = on_done
+        self.task_error = error_message
+        self.task = self.executor.submit(work, self.task_cancel.is_set, self.set_task_progress)
+
+        self.status_label.config(text=description)
+        self.progress_bar.config(mode='determinate' if determinate else 'indeterminate', value=0)
+        if not determinate:
+            self.progress_bar.start(15)
+        self.cancel_button.config(state=tk.NORMAL)
+        self.load_button.config(state=tk.DISABLED)
+        self.run_button.config(state=tk.DISABLED)
+        self.stream_button.config(state=tk.DISABLED)
+        self.root.after(50, self.poll_task)
+
+    def toggle_hud(self):
+        if self.hud_var.get():
+            self.hud_label.place(relx=1.0, x=-10, y=10, anchor='ne')
+            self.hud_label.lift()
+            self.refresh_hud()
+        else:
+            self.hud_label.place_forget()
+            if self.hud_after_id:
+                self.root.after_cancel(self.hud_after_id)
+                self.hud_after_id = None
+
+    def refresh_hud(self):
+        self.hud_label.config(text="\n".join(STAGE_TIMER.summary_lines()) or "No timings yet")
+        self.hud_after_id = self.root.after(500, self.refresh_hud)
+
+    def save_trace(self):
+        file_path = filedialog.asksaveasfilename(defaultextension=".json", filetypes=[("JSON trace", "*.json")])
+        if file_path:
+            try:
+                STAGE_TIMER.dump(file_path)
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to save the timing trace: {e}")
+
+    def on_close(self):
+        if self.watch_after_id:
+            self.root.after_cancel(self.watch_after_id)
+        if self.task is not None:
+            self.task_cancel.set()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.root.destroy()
+
+    def set_task_progress(self, fraction):
+        # Called from the worker thread; poll_task reads it on the Tk thread.
+        self.task_progress = fraction
+
+    def cancel_task(self):
+        if self.task is not None:
+            self.task_cancel.set()
+            self.status_label.config(text="Cancelling...")
+
+    def poll_task(self):
+        if self.task is None:
+            return
+        if not self.task.done():
+            if str(self.progress_bar.cget('mode')) == 'determinate':
+                self.progress_bar.config(value=self.task_progress * 100)
+            self.root.after(50, self.poll_task)
             return
 
-        df['Grade'] = df['Marks'].apply(self.assign_grade)
+        task, on_done, error_message = self.task, self.task_done, self.task_error
+        cancelled = self.task_cancel.is_set()
+        self.task = None
+
+        self.progress_bar.stop()
+        self.progress_bar.config(value=0)
+        self.cancel_button.config(state=tk.DISABLED)
+        self.load_button.config(state=tk.NORMAL)
+        self.run_button.config(state=tk.NORMAL)
+        self.stream_button.config(state=tk.NORMAL)
+        self.status_label.config(text="Cancelled" if cancelled else "")
 
+        from grading_io import ExportCancelled
         try:
-            df.to_excel(output_file, index=False)
-            messagebox.showinfo("Success", f"Grades updated and saved to {output_file}")
+            result = task.result()
+        except ExportCancelled:
+            return
         except Exception as e:
-            messagebox.showerror("Error", f"Failed to save the updated Excel file: {e}")
-
-    def assign_grade(self, marks):
-        for grade, range_str in self.criteria.items():
-            lower_bound, upper_bound = map(float, range_str.split('-'))
-            if lower_bound < marks <= upper_bound:
-                return grade
-        return 'No Grade'
+            messagebox.showerror("Error", f"{error_message}: {e}")
+            return
+        if not cancelled:
+            on_done(result)
 
+    @STAGE_TIMER.timed('on_drag')
     def on_drag(self, event):
         handle = self.drag_data.get('handle')
         if handle is not None:
@@ -241,18 +708,179 @@ class MultiHandleSliderApp:
         self.is_dragging = False
         if self.update_after_id:
             self.root.after_cancel(self.update_after_id)
+        handle = getattr(self, 'drag_data', {}).get('handle')
+        if self.snap_var.get() and handle in self.handles:
+            self.snap_handle(self.handles.index(handle))
         self.update_histogram()
 
+    def snap_handle(self, index):
+        if self.marks_index is None:
+            return
+        value = (self.handle_positions[index] - 50) / (self.slider_width - 100) * self.max_value
+        snapped = self.marks_index.snap_to_gap(value)
+        if snapped is None:
+            return
+
+        new_x = 50 + (snapped / self.max_value) * (self.slider_width - 100)
+        if index > 0:
+            new_x = max(new_x, self.handle_positions[index - 1])
+        if index < len(self.handles) - 1:
+            new_x = min(new_x, self.handle_positions[index + 1])
+
+        self.slider_canvas.move(self.handles[index], new_x - self.handle_positions[index], 0)
+        self.handle_positions[index] = new_x
+        value = round((new_x - 50) / (self.slider_width - 100) * self.max_value, 2)
+        self.value_entries[index].delete(0, tk.END)
+        self.value_entries[index].insert(0, str(value))
+        self.calculate_mark_difference(value)
+
+    def fit_to_targets(self, live=False):
+        # Live refits (on every keystroke) skip half-typed values silently.
+        if self.marks_index is None:
+            if not live:
+                messagebox.showerror("No Data", "Please load a marks file first.")
+            return
+        try:
+            shares = [float(entry.get()) for entry in self.target_entries]
+            window = float(self.window_entry.get() or 0)
+            if min(shares) < 0 or sum(shares) <= 0 or window < 0:
+                raise ValueError
+        except ValueError:
+            if not live:
+                messagebox.showerror("Invalid Targets", "Please enter a non-negative percentage for every grade.")
+            return
+
+        with STAGE_TIMER.stage('fit_targets'):
+            low = self.get_bin_edges()[0]
+            boundaries = self.marks_index.fit_boundaries(shares, window, low=low, high=self.max_value)
+        positions = [round(low, 2)]
+        for value in boundaries:
+            positions.append(min(max(value, positions[-1]), self.max_value))
+        self.set_default_handle_positions(positions)
+        self.update_histogram()
+
+    def current_scheme(self):
+        return GradingScheme.from_handles(self.get_bin_edges()[:-1], self.max_value)
+
+    def save_scenario(self):
+        name = self.scenario_name_entry.get().strip() or f"Scenario {len(self.scenario_schemes) + 1}"
+        self.scenario_schemes[name] = self.current_scheme()
+        if self.scenario_book is not None:
+            self.scenario_book.add(name, self.scenario_schemes[name])
+        self.scenario_name_entry.delete(0, tk.END)
+        self.refresh_scenarios()
+
+    def refresh_scenarios(self):
+        names = list(self.scenario_schemes)
+        self.compare_from.config(values=names)
+        self.compare_to.config(values=names)
+        self.scenario_table.delete(*self.scenario_table.get_children())
+        if self.scenario_book is None:
+            return
+        for name in names:
+            result = self.scenario_book.result(name)
+            self.scenario_table.insert('', tk.END, values=[name] + list(result['counts'].values()) + [f"{result['mean_points']:.2f}"])
+
+    def compare_scenarios(self):
+        old_name, new_name = self.compare_from.get(), self.compare_to.get()
+        if self.scenario_book is None or not old_name or not new_name:
+            messagebox.showerror("Error", "Please load a marks file and pick two saved scenarios.")
+            return
+
+        with STAGE_TIMER.stage('scenario diff'):
+            self.scenario_diff = self.scenario_book.diff(old_name, new_name)
+        moves = "   ".join(f"{old.strip()} → {new.strip()}: {count}" for (old, new), count in self.scenario_diff['moves'].items())
+        self.scenario_diff_label.config(text=f"{old_name} → {new_name}:  {self.scenario_diff['changed']} students change grade    "
+                                             f"Mean GPA shift: {self.scenario_diff['points_shift']:+.2f}\n{moves}")
+
+    def show_changed_students(self):
+        if self.scenario_diff is None:
+            messagebox.showerror("Error", "Please compare two scenarios first.")
+            return
+
+        rows, old_grades, new_grades = self.scenario_book.changed_rows(self.scenario_diff)
+        self.show_students("Changed Students", rows, {'From': [grade.strip() for grade in old_grades],
+                                                      'To': [grade.strip() for grade in new_grades]})
+
+    def show_students(self, title, rows, extra_columns):
+        # Student rows in a separate window, with extra per-row columns.
+        columns = [col for col in ['Roll No', 'Name', 'Marks'] if col in self.marks_frame.columns]
+        dialog = tk.Toplevel(self.root)
+        dialog.title(f"{title} ({len(rows)})")
+        listing = ttk.Treeview(dialog, columns=columns + list(extra_columns), show='headings', height=20)
+        for col in columns + list(extra_columns):
+            listing.heading(col, text=col)
+            listing.column(col, anchor=tk.CENTER, width=120)
+        # Tk lists get slow past a few thousand rows; the first 2000 are shown.
+        from grading_io import widen_floats
+        shown = widen_floats(self.marks_frame.iloc[rows[:2000]])
+        for i, values in enumerate(shown[columns].itertuples(index=False, name=None)):
+            listing.insert('', tk.END, values=list(values) + [extra[i] for extra in extra_columns.values()])
+        listing.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+    def find_student(self):
+        if self.student_index is None:
+            messagebox.showerror("Error", "Please load a marks file first.")
+            return
+
+        roll_number = self.roll_entry.get().strip()
+        student = self.student_index.lookup(roll_number, self.current_scheme())
+        if student is None:
+            self.student_label.config(text=f"Roll No {roll_number} not found.")
+            return
+
+        name = f" ({self.marks_frame['Name'].iat[student['row']]})" if 'Name' in self.marks_frame.columns else ""
+        if student['mark'] is None:
+            self.student_label.config(text=f"{roll_number}{name}: no marks")
+        else:
+            self.student_label.config(text=f"{roll_number}{name}: {student['mark']} marks, grade {student['grade'].strip()}, "
+                                           f"rank {student['rank']:,} of {len(self.marks_index):,}, "
+                                           f"ahead of {student['percentile']:.1f}% of students")
+
+    def show_borderline(self):
+        if self.student_index is None:
+            messagebox.showerror("Error", "Please load a marks file first.")
+            return
+        try:
+            margin = float(self.margin_entry.get())
+        except ValueError:
+            messagebox.showerror("Invalid Input", "Please enter a valid number.")
+            return
+
+        scheme = self.current_scheme()
+        rows, extra = [], {'Grade': [], 'Cutoff': [], 'Distance': []}
+        for group in self.student_index.borderline(scheme, margin):
+            marks = self.student_index.marks[group['rows']]
+            rows.append(group['rows'])
+            extra['Grade'] += [scheme.categories[code].strip() for code in scheme.grade_codes(marks)]
+            extra['Cutoff'] += [f"{group['below'].strip()}/{group['above'].strip()} at {group['cutoff']:.2f}"] * len(marks)
+            extra['Distance'] += [f"{distance:+.2f}" for distance in marks - group['cutoff']]
+        self.show_students(f"Borderline Students (±{margin:g})", np.concatenate(rows) if rows else np.array([], dtype=np.int64), extra)
+
+    def show_top(self):
+        if self.student_index is None:
+            messagebox.showerror("Error", "Please load a marks file first.")
+            return
+        try:
+            k = int(self.top_entry.get())
+        except ValueError:
+            messagebox.showerror("Invalid Input", "Please enter a whole number.")
+            return
+
+        rows = self.student_index.top(k)
+        self.show_students(f"Top {k} Students", rows, {'Rank': self.marks_index.rank(self.student_index.marks[rows]).tolist()})
+
     def calculate_mark_difference(self, current_value):
-        if not self.sorted_marks:
+        if self.marks_index is None or not len(self.marks_index):
             return
 
-        lower_mark = next((mark for mark in self.sorted_marks if mark <= current_value), None)
-        upper_mark = next((mark for mark in reversed(self.sorted_marks) if mark > current_value), None)
+        lower_mark = self.marks_index.nearest_below(current_value)
+        upper_mark = self.marks_index.nearest_above(current_value)
 
         if lower_mark is not None and upper_mark is not None:
             difference = upper_mark - lower_mark
-            self.diff_label.config(text=f"Difference : {difference:.2f}")
+            below = self.marks_index.percentile(current_value)
+            self.diff_label.config(text=f"Difference : {difference:.2f}    Below cutoff : {below:.1f}%")
         else:
             self.diff_label.config(text="")
 
@@ -282,37 +910,71 @@ class MultiHandleSliderApp:
         except ValueError:
             messagebox.showerror("Invalid Input", "Please enter a valid number.")
 
-    def update_histogram(self):
-        if self.data is None:
+    def get_bin_edges(self):
+        return sorted([(x - 50) / (self.slider_width - 100) * self.max_value for x in self.handle_positions] + [self.max_value])
+
+    def build_plot(self):
+        if self.figure is not None:
             return
-        
+        Figure, _ = load_plotting()
+        self.plot_placeholder.destroy()
+        self.figure = Figure(figsize=(12, 6), dpi=100)
+        self.ax = self.figure.add_subplot()
+        self.plot_canvas = timed_canvas(self.figure, self.plot_frame, stage='plot draw')
+        self.plot_canvas.get_tk_widget().pack(fill=tk.BOTH, expand=True, before=self.slider_frame)
+
+    @STAGE_TIMER.timed('build_histogram')
+    def build_histogram(self):
         self.ax.clear()
 
-        bin_edges = sorted([(x - 50) / (self.slider_width - 100) * self.max_value for x in self.handle_positions] + [self.max_value])
-       
-        counts, _ = np.histogram(self.data, bins=bin_edges)
+        self.bin_edges = self.get_bin_edges()
+        self.bin_positions = self.marks_index.bin_positions(self.bin_edges)
+        counts = np.diff(self.bin_positions)
 
         colors = ['#ff6666','#ff9966','#ffc966','#ccff66','#99ff99','#66ffcc','#66cccc','#3399ff','#6633ff']
 
-        for i in range(len(bin_edges) - 1):
-            self.ax.bar(bin_edges[i], counts[i], width=bin_edges[i + 1] - bin_edges[i], 
-                        edgecolor='black', color=colors[i], align='edge')
+        self.bars = []
+        for i in range(len(self.bin_edges) - 1):
+            bar = self.ax.bar(self.bin_edges[i], counts[i], width=self.bin_edges[i + 1] - self.bin_edges[i],
+                              edgecolor='black', color=colors[i], align='edge')
+            self.bars.append(bar.patches[0])
 
         self.ax.set_title("Histogram of Marks",)
         self.ax.set_xlabel("Marks")
         self.ax.set_ylabel("No. of Students")
 
-        sorted_marks = sorted(self.data, reverse=True)
+        self.average_line = self.ax.axvline(self.average_value, color='blue', linestyle='--', label=f'Average: {self.average_value:.2f}')
+        self.ax.legend()
 
         self.figure.tight_layout(pad=0.5)
 
-        for mark in sorted_marks:
-            x_position = 50 + (mark / self.max_value) * (self.slider_width - 100)
-            self.slider_canvas.create_oval(x_position - 2, 15, x_position + 2, 17, fill='red', outline='red')
+        self.build_table()
+        self.update_section_table()
 
-        self.average_value = self.data.mean()
-        self.ax.axvline(self.average_value, color='blue', linestyle='--', label=f'Average: {self.average_value:.2f}')
-        self.ax.legend()
+    @STAGE_TIMER.timed('update_histogram')
+    def update_histogram(self):
+        if self.data is None:
+            return
+
+        # Only bins next to a moved edge are recounted; the bar and table
+        # artists built at load time are updated in place.
+        bin_edges = self.get_bin_edges()
+        changed_bins = set()
+        for i, edge in enumerate(bin_edges):
+            if edge != self.bin_edges[i]:
+                side = 'right' if i == len(bin_edges) - 1 else 'left'
+                self.bin_positions[i] = self.marks_index.position(edge, side=side)
+                changed_bins.update(b for b in (i - 1, i) if 0 <= b < len(self.bars))
+        self.bin_edges = bin_edges
+        counts = np.diff(self.bin_positions)
+
+        for i in changed_bins:
+            self.bars[i].set_x(bin_edges[i])
+            self.bars[i].set_width(bin_edges[i + 1] - bin_edges[i])
+            self.bars[i].set_height(counts[i])
+        if changed_bins:
+            self.ax.relim()
+            self.ax.autoscale_view()
 
         for i, handle in enumerate(self.handles):
             value = round((self.handle_positions[i] - 50) / (self.slider_width - 100) * self.max_value, 2)
@@ -320,75 +982,75 @@ class MultiHandleSliderApp:
             self.slider_canvas.coords(self.value_labels[i], self.handle_positions[i], 40)
             self.slider_canvas.itemconfig(self.value_labels[i], text=label_text)
 
-        self.update_table(bin_edges, counts)
+        self.update_table(bin_edges, counts, self.bin_means())
+        if changed_bins:
+            self.update_section_table()
 
         if self.update_after_id:
             self.root.after_cancel(self.update_after_id)
             self.update_after_id = None
 
-        self.plot_canvas.draw()
-        self.plot_canvas.flush_events()
-
-    def update_table(self, bin_edges, counts):
-        ranges = [f"{bin_edges[i]:.2f}-{bin_edges[i+1]:.2f}" for i in range(9)]
-        total_students = np.sum(counts)
-        percentage_students = [(count / total_students) * 100 for count in counts]
-
-        percentage_consecutive = [0] * len(percentage_students)
-        consecutive_display = [""] * len(percentage_students)
-
-        for i in range(9):
-            if i == 0 or i == 1:
-                percentage_consecutive[i] = percentage_students[0] + percentage_students[1]
-                if i == 0:
-                    consecutive_display[i] = f"{percentage_consecutive[i]:.2f}%"
-            elif i == 3 or i == 4:
-                percentage_consecutive[i] = percentage_students[3] + percentage_students[4]
-                if i == 3:
-                    consecutive_display[i] = f"{percentage_consecutive[i]:.2f}%"
-            elif i == 5 or i == 6:
-                percentage_consecutive[i] = percentage_students[5] + percentage_students[6]
-                if i == 5:
-                    consecutive_display[i] = f"{percentage_consecutive[i]:.2f}%"
-            elif i == 7 or i == 8:
-                percentage_consecutive[i] = percentage_students[7] + percentage_students[8]
-                if i == 7:
-                    consecutive_display[i] = f"{percentage_consecutive[i]:.2f}%"
-            else:
-                percentage_consecutive[i] = percentage_students[i]
-                consecutive_display[i] = f"{percentage_consecutive[i]:.2f}%"
-
-        grades = ['F  ', 'E  ', 'D  ', 'C- ', 'C  ', 'B- ', 'B  ', 'A- ', 'A  ']
+        self.plot_canvas.draw_idle()
+
+    def show_summary(self):
+        # Mean, median and spread from the index's prefix sums, not a pass over the column.
+        summary = self.marks_index.summary()
+        self.average_value = summary['mean']
+        self.summary_label.config(text=f"Students: {summary['students']}    Mean: {summary['mean']:.2f}    "
+                                       f"Median: {summary['median']:.2f}    Std Dev: {summary['std']:.2f}")
+
+    def bin_means(self):
+        return self.marks_index.range_stats(self.bin_positions[:-1], self.bin_positions[1:])[2]
+
+    def table_rows(self, bin_edges, counts, means=None):
+        table_data = grade_table_rows(bin_edges, counts, means=means)
+        for grade, grade_range, *_ in table_data:
+            self.criteria[grade] = grade_range
+        return table_data
+
+    def build_table(self):
+        self.table.delete(*self.table.get_children())
+        self.table_values = {}
+        for i, values in enumerate(self.table_rows(self.bin_edges, np.diff(self.bin_positions), self.bin_means())):
+            self.table.insert('', tk.END, iid=str(i), values=values)
+            self.table_values[i] = values
+
+    @STAGE_TIMER.timed('update_table')
+    def update_table(self, bin_edges, counts, means=None):
+        for i, values in enumerate(self.table_rows(bin_edges, counts, means)):
+            if values != self.table_values.get(i):
+                self.table.item(str(i), values=values)
+                self.table_values[i] = values
+
+    def build_section_table(self):
+        if self.section_table is not None:
+            self.section_table.destroy()
+            self.section_table = None
+        self.section_values = {}
+        if not self.section_indexes:
+            return
 
-        table_data = []
-        for i in range(9):
-            table_data.append([grades[i], ranges[i], counts[i], f"{percentage_students[i]:.2f}%", consecutive_display[i]])
-         
-            if grades[i] in self.criteria:
-                self.criteria[grades[i]] = ranges[i]
-            else:
-                self.criteria[grades[i]] = ranges[i]
-        
-        self.table_figure.set_size_inches(7, 6, forward=True)
-
-        self.table_ax.clear()
-        self.table_ax.axis('tight')
-        self.table_ax.axis('off')
-
-        table = self.table_ax.table(cellText=table_data, colLabels=['Grade', 'Range of \nGrade', 'No. of \nStudents', '%age of \nStudents', '%age Consecutive\n Grades'], loc='center')
-        table.auto_set_column_width(col=[0, 1, 2, 3, 4])
-        table.auto_set_font_size(False)
-        table.set_fontsize(12)
-        table.scale(2, 2.65)
-
-        for (row, col), cell in table.get_celld().items():
-            cell.set_text_props(weight='bold')
-       
-        if hasattr(self, 'table_canvas'):
-            self.table_canvas.get_tk_widget().destroy()
-        self.table_canvas = FigureCanvasTkAgg(self.table_figure, master=self.table_frame)
-        self.table_canvas.get_tk_widget().pack(fill=tk.X)
-        self.table_canvas.draw()
+        columns = ['Section', 'Students'] + [grade.strip() for grade in HANDLE_GRADES]
+        self.section_table = ttk.Treeview(self.table_frame, columns=columns, show='headings',
+                                          height=min(len(self.section_indexes) + 1, 12), selectmode='none')
+        for col in columns:
+            self.section_table.heading(col, text=col)
+            self.section_table.column(col, anchor=tk.CENTER, width=120 if col == 'Section' else 60)
+        for name in list(self.section_indexes) + ['All sections']:
+            self.section_table.insert('', tk.END, iid=name, values=[name])
+        self.section_table.pack(fill=tk.X, pady=10)
+
+    @STAGE_TIMER.timed('update_section_table')
+    def update_section_table(self):
+        if self.section_table is None:
+            return
+        rows = {name: index.bin_counts(self.bin_edges) for name, index in self.section_indexes.items()}
+        rows['All sections'] = np.diff(self.bin_positions)
+        for name, counts in rows.items():
+            values = [name, str(int(counts.sum()))] + [str(count) for count in counts]
+            if values != self.section_values.get(name):
+                self.section_table.item(name, values=values)
+                self.section_values[name] = values
 
 if __name__ == "__main__":
     root = tk.Tk()
@@ -1,9 +1,13 @@
 # app.py
+import hashlib
+import time
+
+import numpy as np
 import streamlit as st
-import pandas as pd
-import matplotlib.pyplot as plt
 from io import BytesIO
 
+from grading_perf import StageTimer
+
 # -----------------------------
 # Page Config
 # -----------------------------
@@ -13,6 +17,10 @@ st.set_page_config(
     layout="wide"
 )
 
+# Per-session stage timings, shown in the sidebar Performance panel
+rerun_start = time.perf_counter()
+timer = st.session_state.setdefault('stage_timer', StageTimer())
+
 # -----------------------------
 # Custom CSS for Dark Mode & Visibility
 # -----------------------------
@@ -77,127 +85,560 @@ st.markdown("---")
 st.sidebar.header("🔧 Customize Grade Boundaries")
 st.sidebar.markdown("Adjust sliders to define minimum marks for each grade:")
 
+# grade, label, slider range and default minimum mark
+CUTOFF_SLIDERS = [('A', "A (Excellent)", 70.0, 100.0, 85.0), ('B', "B (Good)", 60.0, 90.0, 75.0),
+                  ('C', "C (Average)", 50.0, 80.0, 60.0), ('D', "D (Pass)", 40.0, 70.0, 50.0)]
+
+# Cutoffs fitted by the Target Distribution panel on the previous run
+for grade, value in st.session_state.pop('fitted_cutoffs', {}).items():
+    st.session_state[f"cutoff-{grade}"] = value
+
 grade_ranges = {}
-grade_ranges['A'] = st.sidebar.slider("A (Excellent)", 70.0, 100.0, 85.0)
-grade_ranges['B'] = st.sidebar.slider("B (Good)", 60.0, 90.0, 75.0)
-grade_ranges['C'] = st.sidebar.slider("C (Average)", 50.0, 80.0, 60.0)
-grade_ranges['D'] = st.sidebar.slider("D (Pass)", 40.0, 70.0, 50.0)
+for grade, label, low, high, default in CUTOFF_SLIDERS:
+    st.session_state.setdefault(f"cutoff-{grade}", default)
+    grade_ranges[grade] = st.sidebar.slider(label, low, high, key=f"cutoff-{grade}")
 
 st.sidebar.markdown("---")
 st.sidebar.info("💡 Adjust sliders to see changes in real time.")
 
+# Named cutoff sets for the Scenario Comparison section
+with st.sidebar.expander("🧪 Scenarios"):
+    scenario_name = st.text_input("Scenario name", key='scenario-name')
+    if st.button("Save current cutoffs"):
+        scenarios = st.session_state.setdefault('scenarios', {})
+        scenarios[scenario_name.strip() or f"Scenario {len(scenarios) + 1}"] = dict(grade_ranges)
+    if st.session_state.get('scenarios') and st.button("Clear scenarios"):
+        st.session_state['scenarios'] = {}
+
+# -----------------------------
+# Cached Loading
+# -----------------------------
+# Rows shown in the grades table; the download has the full file.
+PREVIEW_ROWS = 1_000
+
+# Slider changes rerun the whole script; the parsed, filtered and sorted
+# marks frame is reused across reruns, keyed on the upload's content hash.
+# It is shared rather than copied on every rerun, so it is never modified:
+# grades go on a new frame with df.assign.
+@st.cache_resource(max_entries=8, show_spinner=False)
+def load_marks(file_hash, file_name, _content, sheets=None):
+    if sheets:
+        # One section per sheet, parsed in parallel worker processes
+        frames = load_sheets(_content, sheets)
+        if any('Marks' not in frame.columns for frame in frames.values()):
+            return None
+        df = combine_sections(frames)
+    else:
+        df = read_marks(BytesIO(_content), name=file_name)
+
+    # Validate 'Marks' column
+    if 'Marks' not in df.columns:
+        return None
+
+    # Preserve available columns
+    available_cols = [col for col in ['SNo', 'Roll No', 'Name', 'Marks', 'Section'] if col in df.columns]
+
+    # Sort by Marks (high to low)
+    return df[available_cols].sort_values(by='Marks', ascending=False).reset_index(drop=True)
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def workbook_sheets(file_hash, file_name, _content):
+    if detect_format(BytesIO(_content), name=file_name) != 'xlsx':
+        return []
+    return list_sheets(_content)
+
+
+def section_cutoffs(section):
+    # Sidebar sliders for one section, starting from the shared boundaries.
+    with st.sidebar.expander(f"📑 {section}"):
+        return {
+            grade: st.slider(label, low, high, grade_ranges[grade], key=f"cutoff-{section}-{grade}")
+            for grade, label, low, high, _ in CUTOFF_SLIDERS
+        }
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def index_marks(dataset_key, _marks):
+    # Sorted marks for the target fit and scenario diffs; a read-only resource,
+    # so reruns share it uncopied.
+    return MarksIndex(_marks, with_order=True)
+
+
+def fit_cutoffs(index):
+    # Sidebar panel that keeps the shared sliders fitted to target shares per grade.
+    with st.sidebar.expander("🎯 Target Distribution"):
+        targets = {grade: st.number_input(f"{grade} (% of students)", 0.0, 100.0, float(share), step=1.0, key=f"target-{grade}")
+                   for grade, share in DEFAULT_CUTOFF_TARGETS.items()}
+        window = st.slider("Gap window (± % of students)", 0.0, 5.0, 1.0, step=0.5,
+                           help="Move each cutoff to the widest gap between marks within this window.")
+        if not st.checkbox("Fit cutoffs to targets", key='fit-targets'):
+            return
+
+        boundaries = index.fit_boundaries([targets[grade] for grade in ['F', 'D', 'C', 'B', 'A']], window)
+        fitted = {}
+        floor = 0.0
+        for (grade, label, low, high, _), boundary in zip(CUTOFF_SLIDERS[::-1], boundaries):
+            # The lowest mark above the gap is the minimum mark for the grade,
+            # kept within the slider range and above the grade below it
+            minimum = index.nearest_above(boundary)
+            value = boundary if minimum is None else minimum
+            fitted[grade] = float(min(max(value, low, floor), high))
+            floor = fitted[grade]
+            if fitted[grade] != value:
+                st.caption(f"⚠️ {grade} cutoff moved from {value:g} to {fitted[grade]:g} to stay within "
+                           f"{low:g}-{high:g} and above the lower grades.")
+
+    if any(fitted[grade] != grade_ranges[grade] for grade in fitted):
+        st.session_state['fitted_cutoffs'] = fitted
+        st.rerun()
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def index_sections(dataset_key, _df):
+    # One sorted index per section, so per-section counts and means are
+    # lookups like the combined ones.
+    marks = _df['Marks'].to_numpy()
+    return {section: MarksIndex(marks[rows]) for section, rows in _df.groupby('Section', observed=True).indices.items()}
+
+
+@st.cache_resource(max_entries=8, show_spinner=False)
+def index_students(dataset_key, _df, _index):
+    # Roll No -> row map over the sorted frame, shared by reruns like index_marks.
+    return StudentIndex(_df['Marks'], _df['Roll No'] if 'Roll No' in _df.columns else None, _index)
+
+
+def student_queries(students, df, scheme, per_section):
+    # Per-student lookups answered from the index, never by filtering df.
+    find_tab, borderline_tab, top_tab = st.tabs(["🔎 Find Student", "⚖️ Borderline Students", "🏆 Top Students"])
+    with find_tab:
+        if not students.rows:
+            st.info("This file has no roll numbers to search.")
+        elif roll_number := st.text_input("Roll No", key='find-roll').strip():
+            row = students.find(roll_number)
+            if row is None:
+                st.warning(f"Roll No {roll_number} not found.")
+            else:
+                student = students.student(row)
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Marks", "—" if student['mark'] is None else student['mark'])
+                col2.metric("Grade", df['Grade'].iat[row])
+                col3.metric("Rank", "—" if student['rank'] is None else f"{student['rank']:,} of {len(students.index):,}")
+                col4.metric("Ahead of", "—" if student['percentile'] is None else f"{student['percentile']:.1f}%")
+                st.dataframe(df.iloc[[row]], use_container_width=True)
+
+    with borderline_tab:
+        margin = st.number_input("Within ± marks of a cutoff", 0.0, 10.0, 0.5, step=0.1, key='borderline-margin')
+        groups = students.borderline(scheme, margin)
+        sizes = [len(group['rows']) for group in groups]
+        rows = np.concatenate([group['rows'] for group in groups])
+        cutoffs = np.repeat([group['cutoff'] for group in groups], sizes)
+        st.dataframe(df.iloc[rows].assign(Cutoff=np.repeat([f"{group['below']}/{group['above']} at {group['cutoff']:g}" for group in groups], sizes),
+                                          Distance=np.round(students.marks[rows] - cutoffs, 2)),
+                     use_container_width=True, height=300)
+        if per_section:
+            st.caption("Borderline students are measured against the shared boundaries.")
+
+    with top_tab:
+        k = st.number_input("Students", 1, max(len(students.index), 1), min(10, max(len(students.index), 1)), key='top-k')
+        rows = students.top(int(k))
+        st.dataframe(df.iloc[rows].assign(Rank=students.index.rank(students.marks[rows])), use_container_width=True, height=300)
+
+
+def compare_scenarios(index, df, scheme):
+    # Saved cutoff sets beside the live sliders. Counts and diffs come from the
+    # sorted marks and are memoized per session, so reruns don't regrade.
+    book = st.session_state.get('scenario_book')
+    if book is None or book.index is not index:
+        book = st.session_state['scenario_book'] = ScenarioBook(index)
+    book.scenarios.clear()
+    for name, cutoffs in st.session_state.get('scenarios', {}).items():
+        book.add(name, GradingScheme.from_cutoffs(cutoffs))
+    book.add("Current sliders", scheme)
+    names = list(book.scenarios)
+
+    rows = {}
+    for name in names:
+        result = book.result(name)
+        rows[name] = dict(result['counts'], **{'Mean GPA': round(result['mean_points'], 2)})
+    st.dataframe(pd.DataFrame.from_dict(rows, orient='index'), use_container_width=True)
+
+    col1, col2 = st.columns(2)
+    old_name = col1.selectbox("From", names, index=0, key='scenario-from')
+    new_name = col2.selectbox("To", names, index=len(names) - 1, key='scenario-to')
+    diff = book.diff(old_name, new_name)
+
+    col1, col2 = st.columns(2)
+    col1.metric("Students changing grade", diff['changed'])
+    col2.metric("Mean GPA shift", f"{book.result(new_name)['mean_points']:.2f}", f"{diff['points_shift']:+.2f}")
+    if diff['changed']:
+        st.table(pd.DataFrame([(old, new, count) for (old, new), count in diff['moves'].items()],
+                              columns=['From', 'To', 'Students']))
+        changed, old_grades, new_grades = book.changed_rows(diff)
+        st.dataframe(df.iloc[changed].drop(columns='Grade').assign(From=old_grades, To=new_grades),
+                     use_container_width=True, height=300)
+
+
+def grade_sections(df, schemes):
+    codes = np.empty(len(df), dtype=np.int8)
+    marks = df['Marks'].to_numpy()
+    for section, rows in df.groupby('Section', observed=True).indices.items():
+        codes[rows] = schemes[section].grade_codes(marks[rows])
+    categories = next(iter(schemes.values())).categories
+    return pd.Categorical.from_codes(codes, categories=categories)
+
+
+@st.cache_data(max_entries=8, show_spinner=False)
+def bin_marks(dataset_key, _marks):
+    # 0.1-mark counts per upload; the chart is derived from these on every rerun.
+    high = max(100.0, float(np.ceil(np.nanmax(_marks)))) if len(_marks) else 100.0
+    return FineHistogram(_marks, high=high)
+
+
+def histogram_spec(hist, scheme, grade_counts):
+    # Vega-Lite spec rendered in the browser. Each grade zone is split into
+    # 15 bars, like the old per-zone ax.hist calls.
+    colors = {'F': '#d9534f', 'D': '#f0ad4e', 'C': '#5bc0de', 'B': '#428bca', 'A': '#5cb85c'}
+    zone_edges = np.clip(scheme.edges, hist.low, hist.high)
+
+    rows = []
+    for grade, lower, upper in zip(scheme.labels, zone_edges[:-1], zone_edges[1:]):
+        if upper <= lower:
+            continue
+        edges = np.linspace(lower, upper, 16)
+        for start, end, count in zip(edges[:-1], edges[1:], hist.rebin(edges)):
+            rows.append({'start': float(start), 'end': float(end), 'students': int(count),
+                         'grade': f"{grade}: {grade_counts[grade]}"})
+
+    legend = [f"{grade}: {grade_counts[grade]}" for grade in scheme.labels]
+    return {
+        'title': "📊 Distribution of Marks",
+        'height': 400,
+        'layer': [
+            {
+                'data': {'values': rows},
+                'mark': {'type': 'bar', 'opacity': 0.8, 'stroke': 'black', 'strokeWidth': 0.5},
+                'encoding': {
+                    'x': {'field': 'start', 'type': 'quantitative', 'title': "Marks",
+                          'scale': {'domain': [hist.low, hist.high]}},
+                    'x2': {'field': 'end'},
+                    'y': {'field': 'students', 'type': 'quantitative', 'title': "Number of Students"},
+                    'color': {'field': 'grade', 'type': 'nominal', 'title': None,
+                              'scale': {'domain': legend, 'range': [colors.get(grade, '#999999') for grade in scheme.labels]}},
+                    'tooltip': [{'field': 'grade'}, {'field': 'students'}],
+                },
+            },
+            {
+                'data': {'values': [{'mean': hist.mean, 'label': f"Average: {hist.mean:.1f}"}]},
+                'mark': {'type': 'rule', 'color': 'red', 'strokeDash': [6, 4], 'strokeWidth': 3},
+                'encoding': {'x': {'field': 'mean', 'type': 'quantitative'}, 'tooltip': [{'field': 'label'}]},
+            },
+        ],
+    }
+
+
+@st.cache_data(max_entries=4, show_spinner="Preparing export...")
+def build_export(dataset_key, boundaries, export_format, _df):
+    # Multi-section workbooks export one sheet per section
+    return export_bytes(_df, export_format, split_by='Section' if 'Section' in _df.columns else None)
+
+
+@st.cache_resource(show_spinner=False)
+def course_cache():
+    # Sorted marks and histogram per course file, keyed by content hash and
+    # shared by all sessions, so boundary changes never reread a course.
+    return LRUCache(256)
+
+
+def course_dashboard(uploaded_files, scheme):
+    # One row per course, regraded from its cached index on every rerun.
+    cache = course_cache()
+    courses, entries, missing = [], {}, {}
+    with timer.stage('read'):
+        for upload in uploaded_files:
+            content = upload.getvalue()
+            file_hash = hashlib.sha256(content).hexdigest()
+            courses.append((upload.name, file_hash))
+            entries[file_hash] = cache.get(file_hash)
+            if entries[file_hash] is None:
+                missing[file_hash] = (content, upload.name)
+        if missing:
+            with st.spinner(f"📊 Loading {len(missing)} course files..."):
+                # Files that fail to parse are cached too, so they aren't retried every rerun
+                for file_hash, result in load_courses(missing).items():
+                    entries[file_hash] = cache.put(file_hash, result)
+
+    with timer.stage('dashboard'):
+        order = list(range(len(scheme.labels)))[::-1]
+        grades = [scheme.categories[code].strip() for code in order]
+        # Every grade above the lowest has a minimum mark
+        cutoffs = [(grade, scheme.edges[code]) for grade, code in zip(grades, order) if np.isfinite(scheme.edges[code])]
+
+        rows, loaded = [], {}
+        for name, file_hash in courses:
+            entry = entries[file_hash]
+            if isinstance(entry, Exception):
+                st.warning(f"⚠️ {name}: {entry}")
+                continue
+            index, hist = entry
+            stats = index.grade_stats(scheme)
+            summary = index.summary()
+            above = np.cumsum(stats['percentages'][order])
+            rows.append([name, int(stats['counts'].sum()), summary['mean'], summary['median']]
+                        + list(stats['counts'][order]) + list(above[:len(cutoffs)]))
+            loaded[name] = (hist, stats)
+
+        if not rows:
+            return
+        columns = (['Course', 'Students', 'Mean', 'Median'] + grades
+                   + [f"≥ {grade} ({cutoff:g}) %" for grade, cutoff in cutoffs])
+        grid = pd.DataFrame(rows, columns=columns)
+
+        total = merge_grade_stats(stats for _, stats in loaded.values())
+        col1, col2, col3 = st.columns(3)
+        col1.metric("Courses", len(rows))
+        col2.metric("Students", f"{int(total['counts'].sum()):,}")
+        col3.metric("Mean", f"{total['sums'].sum() / max(total['present'].sum(), 1):.2f}")
+
+        st.dataframe(grid.round(2), use_container_width=True, hide_index=True, height=min(38 + 35 * len(rows), 600))
+        st.download_button(
+            label="⬇️ Download Summary CSV",
+            data=grid.round(2).to_csv(index=False),
+            file_name="course_summary.csv",
+            mime="text/csv"
+        )
+
+        course = st.selectbox("📊 Course histogram", list(loaded))
+        hist, stats = loaded[course]
+        st.vega_lite_chart(histogram_spec(hist, scheme, dict(zip(scheme.categories, stats['counts']))),
+                           use_container_width=True)
+
+
 # -----------------------------
 # File Uploader
 # -----------------------------
-st.markdown("<div class='info-box'>"
-            "📥 Upload your <strong>Marks for Grading.xlsx</strong> or any Excel file with a <code>Marks</code> column.</div>",
-            unsafe_allow_html=True)
+dashboard = st.radio("Mode", ["Single course", "Course dashboard"], horizontal=True,
+                     label_visibility="collapsed") == "Course dashboard"
 
-uploaded_file = st.file_uploader(
-    "Upload Excel File",
-    type=["xlsx"],
-    label_visibility="collapsed"
-)
+if dashboard:
+    st.markdown("<div class='info-box'>"
+                "📥 Upload one marks file per course to compare them side by side with the sidebar boundaries.</div>",
+                unsafe_allow_html=True)
+    uploaded_files = st.file_uploader(
+        "Upload Marks Files",
+        type=["xlsx", "csv", "parquet"],
+        accept_multiple_files=True,
+        label_visibility="collapsed"
+    )
+    uploaded_file = None
+else:
+    st.markdown("<div class='info-box'>"
+                "📥 Upload your <strong>Marks for Grading.xlsx</strong> or any Excel, CSV or Parquet file with a <code>Marks</code> column.</div>",
+                unsafe_allow_html=True)
+    uploaded_file = st.file_uploader(
+        "Upload Marks File",
+        type=["xlsx", "csv", "parquet"],
+        label_visibility="collapsed"
+    )
+
+if dashboard and uploaded_files:
+    import pandas as pd
+    from grading_core import GradingScheme, LRUCache, merge_grade_stats
+    from grading_io import load_courses
+
+    st.subheader("📚 Course Dashboard")
+    try:
+        course_dashboard(uploaded_files, GradingScheme.from_cutoffs(grade_ranges))
+    except Exception as e:
+        st.error(f"❌ Error processing files: {e}")
+elif uploaded_file:
+    # pandas and the grading modules load with the first upload, so the page
+    # renders without waiting for them.
+    import pandas as pd
+    from grading_core import (DEFAULT_CUTOFF_TARGETS, FineHistogram, GradingScheme, MarksIndex, ScenarioBook, StudentIndex,
+                              grade_marks, merge_grade_stats)
+    from grading_io import (EXPORT_FORMATS, combine_sections, detect_format, export_bytes, list_sheets, load_sheets,
+                            read_marks)
 
-if uploaded_file:
     with st.spinner("📊 Processing student data..."):
         try:
-            # Read Excel
-            df = pd.read_excel(uploaded_file)
+            # Read marks (parsed once per distinct upload)
+            with timer.stage('read'):
+                content = uploaded_file.getvalue()
+                file_hash = hashlib.sha256(content).hexdigest()
+                sheets = workbook_sheets(file_hash, uploaded_file.name, content)
 
-            # Validate 'Marks' column
-            if 'Marks' not in df.columns:
+            # Workbooks with a sheet per section
+            selected_sheets = None
+            per_section = False
+            if len(sheets) > 1:
+                selected_sheets = st.multiselect("📑 Sections (sheets) to grade", sheets, default=sheets) or sheets
+                per_section = st.radio("Boundaries", ["Shared", "Per section"], horizontal=True) == "Per section"
+
+            # Identifies the loaded rows for every cache below
+            dataset_key = (file_hash, tuple(selected_sheets) if selected_sheets else None)
+
+            with timer.stage('read'):
+                df = load_marks(file_hash, uploaded_file.name, content, dataset_key[1])
+
+            if df is None:
                 st.error("❌ Your file must have a column named **'Marks'**.")
             else:
-                # Preserve available columns
-                available_cols = [col for col in ['SNo', 'Roll No', 'Name', 'Marks'] if col in df.columns]
-
-                # Sort by Marks (high to low)
-                df = df[available_cols].sort_values(by='Marks', ascending=False).reset_index(drop=True)
+                index = index_marks(dataset_key, df['Marks'].to_numpy())
+                fit_cutoffs(index)
 
                 # Assign Grades
-                def assign_grade(marks):
-                    if marks >= grade_ranges['A']:
-                        return 'A'
-                    elif marks >= grade_ranges['B']:
-                        return 'B'
-                    elif marks >= grade_ranges['C']:
-                        return 'C'
-                    elif marks >= grade_ranges['D']:
-                        return 'D'
+                with timer.stage('grade'):
+                    scheme = GradingScheme.from_cutoffs(grade_ranges)
+                    if per_section:
+                        st.sidebar.markdown("**Per-section boundaries**")
+                        schemes = {section: GradingScheme.from_cutoffs(section_cutoffs(section)) for section in selected_sheets}
+                        boundaries = tuple((section, schemes[section].boundaries) for section in selected_sheets)
+                        df = df.assign(Grade=grade_sections(df, schemes))
                     else:
-                        return 'F'
-
-                df['Grade'] = df['Marks'].apply(assign_grade)
+                        boundaries = scheme.boundaries
+                        df = df.assign(Grade=grade_marks(df['Marks'], scheme))
 
                 # -----------------------------
                 # Display Data
                 # -----------------------------
                 st.subheader("📋 Student Grades (Sorted by Marks)")
-                st.dataframe(df, use_container_width=True, height=400)
+                with timer.stage('table'):
+                    # Sending every row to the browser dominates a rerun on large files
+                    st.dataframe(df.head(PREVIEW_ROWS), use_container_width=True, height=400)
+                if len(df) > PREVIEW_ROWS:
+                    st.caption(f"Showing the top {PREVIEW_ROWS:,} of {len(df):,} students; the download below has every row.")
 
                 # -----------------------------
                 # Statistics
                 # -----------------------------
                 st.subheader("📈 Performance Analytics")
 
+                summary = index.summary()
+                col1, col2, col3, col4 = st.columns(4)
+                col1.metric("Students", f"{summary['students']:,}")
+                col2.metric("Mean", f"{summary['mean']:.2f}")
+                col3.metric("Median", f"{summary['median']:.2f}")
+                col4.metric("Std Dev", f"{summary['std']:.2f}")
+
                 col1, col2 = st.columns([1, 2])
 
                 with col1:
-                    # Grade counts and percentages
-                    grade_counts = df['Grade'].value_counts().reindex(['A', 'B', 'C', 'D', 'F'], fill_value=0)
-                    total = len(df)
-                    grade_percent = (grade_counts / total * 100).round(1)
+                    # Grade counts, percentages and means from the sorted marks
+                    with timer.stage('statistics'):
+                        sections = index_sections(dataset_key, df) if 'Section' in df.columns else {}
+                        if sections:
+                            section_stats = {section: section_index.grade_stats(schemes[section] if per_section else scheme)
+                                             for section, section_index in sections.items()}
+                            stats = merge_grade_stats(section_stats.values())
+                        else:
+                            stats = index.grade_stats(scheme)
+                        grade_counts = dict(zip(scheme.categories, stats['counts']))
+
+                        # Highest grade first; ungraded students only when there are any
+                        order = list(range(len(scheme.labels)))[::-1]
+                        if scheme.default_code >= len(scheme.labels) and stats['counts'][scheme.default_code]:
+                            order.append(scheme.default_code)
+                        grades = [scheme.categories[code].strip() for code in order]
+
+                        stats_df = pd.DataFrame({
+                            'Students': stats['counts'][order],
+                            'Percentage (%)': stats['percentages'][order].round(1),
+                            'Mean Marks': stats['means'][order].round(2)
+                        }, index=grades)
+                        st.table(stats_df)
 
-                    stats_df = pd.DataFrame({
-                        'Students': grade_counts,
-                        'Percentage (%)': grade_percent
-                    })
-                    st.table(stats_df)
+                        if sections:
+                            # Combined and per-section distribution
+                            section_df = pd.DataFrame(
+                                [list(part['counts'][order]) + [part['counts'].sum(), sections[section].summary()['mean']]
+                                 for section, part in section_stats.items()]
+                                + [list(stats['counts'][order]) + [stats['counts'].sum(), index.summary()['mean']]],
+                                index=list(section_stats) + ['All sections'], columns=grades + ['Students', 'Mean'])
+                            st.markdown("**🏫 Section Distribution**")
+                            st.dataframe(section_df.round(2), use_container_width=True)
 
                 with col2:
                     # Histogram with color zones
-                    fig, ax = plt.subplots(figsize=(10, 6))
-                    bins = [0, grade_ranges['D'], grade_ranges['C'], grade_ranges['B'], grade_ranges['A'], 100]
-                    colors = ['#d9534f', '#f0ad4e', '#5bc0de', '#428bca', '#5cb85c']
-                    labels = ['F', 'D', 'C', 'B', 'A']
-
-                    for i in range(len(bins) - 1):
-                        data = df[(df['Marks'] >= bins[i]) & (df['Marks'] < bins[i + 1])]['Marks']
-                        ax.hist(data, bins=15, range=(bins[i], bins[i + 1]),
-                                color=colors[i], alpha=0.8, edgecolor='black', label=f"{labels[i]}: {len(data)}")
-
-                    avg_mark = df['Marks'].mean()
-                    ax.axvline(avg_mark, color='red', linestyle='--', linewidth=3,
-                               label=f'Average: {avg_mark:.1f}')
-                    ax.set_title("📊 Distribution of Marks", fontsize=16, fontweight='bold')
-                    ax.set_xlabel("Marks")
-                    ax.set_ylabel("Number of Students")
-                    ax.legend()
-                    st.pyplot(fig)
+                    with timer.stage('plot'):
+                        if per_section and sections:
+                            # Zones differ by section, so one section is drawn with its own boundaries and counts
+                            section = st.selectbox("Histogram for section", list(section_stats))
+                            hist = bin_marks((dataset_key, section), sections[section].sorted)
+                            chart_scheme = schemes[section]
+                            chart_counts = dict(zip(chart_scheme.categories, section_stats[section]['counts']))
+                        else:
+                            hist = bin_marks(dataset_key, df['Marks'].to_numpy())
+                            chart_scheme, chart_counts = scheme, grade_counts
+                        st.vega_lite_chart(histogram_spec(hist, chart_scheme, chart_counts), use_container_width=True)
+                        st.caption(f"Average: {hist.mean:.1f}")
+
+                # -----------------------------
+                # Student Lookup
+                # -----------------------------
+                st.subheader("🔎 Student Lookup")
+                with timer.stage('lookup'):
+                    student_queries(index_students(dataset_key, df, index), df, scheme, per_section)
+
+                # -----------------------------
+                # Scenario Comparison
+                # -----------------------------
+                if st.session_state.get('scenarios'):
+                    st.subheader("🧪 Scenario Comparison")
+                    with timer.stage('scenarios'):
+                        compare_scenarios(index, df, scheme)
 
                 # -----------------------------
                 # Export Button
                 # -----------------------------
                 st.subheader("💾 Export Graded Data")
 
-                output = BytesIO()
-                with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                    df.to_excel(writer, sheet_name='Graded Results', index=False)
-                output.seek(0)
-
-                st.download_button(
-                    label="⬇️ Download as Excel",
-                    data=output,
-                    file_name="graded_output_with_grades.xlsx",
-                    mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                # The file is only written once the user asks for it, and is
+                # then reused until the upload, boundaries or format change.
+                export_format = st.radio(
+                    "Format",
+                    list(EXPORT_FORMATS),
+                    format_func=lambda fmt: EXPORT_FORMATS[fmt][0],
+                    horizontal=True
                 )
+                export_key = (dataset_key, boundaries, export_format)
+
+                if st.button("📦 Prepare Download"):
+                    st.session_state['export_key'] = export_key
+
+                if st.session_state.get('export_key') == export_key:
+                    with timer.stage('export'):
+                        label, mime = EXPORT_FORMATS[export_format]
+                        st.download_button(
+                            label=f"⬇️ Download as {label}",
+                            data=build_export(dataset_key, boundaries, export_format, df),
+                            file_name=f"graded_output_with_grades.{export_format}",
+                            mime=mime
+                        )
 
         except Exception as e:
             st.error(f"❌ Error processing file: {e}")
 else:
     st.markdown("<div style='text-align: center; padding: 40px; color: #aaa;'>"
-                "📁 Upload a file to get started.</div>", unsafe_allow_html=True)
+                f"📁 Upload {'course files' if dashboard else 'a file'} to get started.</div>", unsafe_allow_html=True)
+
+# -----------------------------
+# Performance Panel
+# -----------------------------
+timer.record('rerun', rerun_start, time.perf_counter())
+with st.sidebar.expander("⏱️ Performance"):
+    # A markdown table, so the panel doesn't load pandas before the first upload
+    st.markdown("\n".join(["| Stage | Count | p50 ms | p95 ms | Last ms |", "|---|---:|---:|---:|---:|"] + [
+        f"| {stage} | {stat['count']} | {stat['p50_ms']:.2f} | {stat['p95_ms']:.2f} | {stat['last_ms']:.2f} |"
+        for stage, stat in timer.stats().items()]))
+    st.download_button(
+        label="⬇️ Download JSON Trace",
+        data=timer.trace_json(),
+        file_name="grading_trace.json",
+        mime="application/json"
+    )
+    if st.button("Reset Timings"):
+        timer.reset()
 
 # -----------------------------
 # Footer
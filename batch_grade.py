@@ -0,0 +1,287 @@
+# Headless batch grading: grades every marks file in a directory or glob
+# across a process pool, one file per worker, and writes a summary of the
+# per-file grade distributions.
+#
+#   python batch_grade.py "courses/*.xlsx" --cutoffs A=85,B=75,C=60,D=50
+#   python batch_grade.py courses/ --handles 0,15,25,40,50,65,75,85,95 --format csv
+#   python batch_grade.py course_sections.xlsx --all-sheets
+#   python batch_grade.py national_results.csv --stream --format parquet
+#   python batch_grade.py moderation/marks.xlsx --watch
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from grading_core import (DEFAULT_CUTOFFS, HANDLE_GRADES, GradingScheme, delta_size, diff_marks, grade_marks,
+                          grade_table_rows)
+from grading_io import (EXPORT_FORMATS, MARKS_FILE_TYPES, STREAM_CHUNK_ROWS, delta_frame, delta_path, detect_format,
+                        file_signature, list_sheets, read_marks, settled_signature, stream_grade, write_frame)
+
+TABLE_COLUMNS = ['Grade', 'Range of Grade', 'No. of Students', '%age of Students', '%age Consecutive Grades']
+
+
+def parse_handles(spec):
+    values = [float(value) for value in spec.split(',')]
+    if len(values) != 9:
+        raise argparse.ArgumentTypeError("--handles needs nine comma-separated values.")
+    return values
+
+
+def parse_cutoffs(spec):
+    cutoffs = {}
+    for item in spec.split(','):
+        grade, _, value = item.partition('=')
+        if not value:
+            raise argparse.ArgumentTypeError("--cutoffs entries look like A=85.")
+        cutoffs[grade.strip()] = float(value)
+    return cutoffs
+
+
+def find_marks_files(inputs, exclude_dir=None):
+    files = []
+    for pattern in inputs:
+        if os.path.isdir(pattern):
+            candidates = [os.path.join(pattern, name) for name in sorted(os.listdir(pattern))]
+        else:
+            candidates = sorted(glob.glob(pattern)) or [pattern]
+        for path in candidates:
+            name = os.path.basename(path)
+            if not os.path.isfile(path) or name.startswith('~$'):
+                continue
+            if not name.lower().endswith(MARKS_FILE_TYPES):
+                continue
+            if exclude_dir and os.path.abspath(path).startswith(exclude_dir + os.sep):
+                continue
+            if path not in files:
+                files.append(path)
+    return files
+
+
+def grade_file(path, scheme, output_dir, output_format, sheet=None, stream=False, chunk_rows=STREAM_CHUNK_ROWS, stem=None):
+    stem = stem or output_stem(path, sheet)
+    if stream:
+        return stream_file(path, scheme, output_dir, output_format, sheet, chunk_rows, stem)
+
+    start = time.perf_counter()
+    summary = {'file': path, 'sheet': sheet}
+    try:
+        df = read_marks(path) if sheet is None else read_marks(path, fmt='xlsx', sheet_name=sheet)
+        if 'Marks' not in df.columns:
+            raise ValueError("The marks file must contain a 'Marks' column.")
+
+        df['Grade'] = grade_marks(df['Marks'], scheme)
+        output_file = os.path.join(output_dir, f"{stem}_graded.{output_format}")
+        write_frame(df, output_file, output_format)
+
+        counts = df['Grade'].value_counts(sort=False)
+        summary.update({'output': output_file, 'students': len(df), 'mean': df['Marks'].astype('float64').mean()})
+        summary.update({grade.strip(): int(counts[grade]) for grade in scheme.categories})
+    except Exception as e:
+        summary['error'] = str(e)
+    summary['seconds'] = round(time.perf_counter() - start, 3)
+    return summary
+
+
+def output_stem(path, sheet, with_extension=False):
+    stem, extension = os.path.splitext(os.path.basename(path))
+    if with_extension:
+        stem = f"{stem}_{extension.lstrip('.').lower()}"
+    return stem if sheet is None else f"{stem}_{sheet}"
+
+
+def output_stems(jobs):
+    # Output stem per (path, sheet) job. Inputs that differ only in their
+    # extension (course1.xlsx, course1.csv) keep it in the stem; any other
+    # clash would overwrite an output, so it is an error. Compared without
+    # case for case-insensitive file systems.
+    def clashes(stems):
+        seen = {}
+        for job, stem in stems.items():
+            seen.setdefault(stem.lower(), []).append(job)
+        return [group for group in seen.values() if len(group) > 1]
+
+    stems = {job: output_stem(*job) for job in jobs}
+    for clash in clashes(stems):
+        stems.update({job: output_stem(*job, with_extension=True) for job in clash})
+    for clash in clashes(stems):
+        names = ", ".join(path if sheet is None else f"{path} [{sheet}]" for path, sheet in clash)
+        raise ValueError(f"{names} would all be written as {stems[clash[0]]}_graded; grade them in separate runs.")
+    return stems
+
+
+def stream_file(path, scheme, output_dir, output_format, sheet, chunk_rows, stem):
+    # Out-of-core path for files too large to load: grades chunk by chunk and
+    # also writes the desktop grade table for nine-handle schemes.
+    start = time.perf_counter()
+    summary = {'file': path, 'sheet': sheet}
+    try:
+        output_file = os.path.join(output_dir, f"{stem}_graded.{output_format}")
+        tally = stream_grade(path, scheme, output_file, output_format, chunk_rows=chunk_rows,
+                             sheet_name=0 if sheet is None else sheet)
+
+        if scheme.labels == HANDLE_GRADES:
+            table = pd.DataFrame(grade_table_rows(tally.bin_edges, tally.bin_counts), columns=TABLE_COLUMNS)
+            table.to_csv(os.path.join(output_dir, f"{stem}_grade_table.csv"), index=False)
+
+        summary.update({'output': output_file, 'students': tally.students, 'mean': tally.mean})
+        summary.update({grade.strip(): count for grade, count in tally.distribution().items()})
+    except Exception as e:
+        summary['error'] = str(e)
+    summary['seconds'] = round(time.perf_counter() - start, 3)
+    return summary
+
+
+def watch_files(files, scheme, output_dir, output_format, interval=1.0, rewrite_output=False):
+    # Grades each file once, then polls for saves. A save is diffed against
+    # the previous load by Roll No and only the changed students are written,
+    # to a new delta file; grade counts are updated from the delta alone.
+    def grade_counts(marks):
+        return np.bincount(scheme.grade_codes(marks), minlength=len(scheme.categories))
+
+    stems = output_stems([(path, None) for path in files])
+    watched = {}
+    for path in files:
+        signature = file_signature(path)
+        df = read_marks(path)
+        if 'Marks' not in df.columns:
+            print(f"FAILED {path}: The marks file must contain a 'Marks' column.", file=sys.stderr)
+            continue
+        output_file = os.path.join(output_dir, f"{stems[(path, None)]}_graded.{output_format}")
+        write_frame(df.assign(Grade=grade_marks(df['Marks'], scheme)), output_file, output_format)
+        watched[path] = {'signature': signature, 'df': df, 'counts': grade_counts(df['Marks']), 'output': output_file}
+        print(f"graded {path} ({len(df)} students) -> {output_file}")
+    if not watched:
+        return 1
+    print(f"watching {len(watched)} file(s) every {interval:g}s; Ctrl+C to stop")
+
+    while True:
+        time.sleep(interval)
+        for path, state in watched.items():
+            if file_signature(path) in (None, state['signature']):
+                continue
+            # Files still being written are picked up on a later check.
+            start = time.perf_counter()
+            signature = settled_signature(path)
+            if signature is None:
+                continue
+            state['signature'] = signature
+            # A failure is reported and the file stays on its last good load.
+            try:
+                df = read_marks(path)
+                if 'Marks' not in df.columns:
+                    raise ValueError("The marks file must contain a 'Marks' column.")
+
+                old_df = state['df']
+                delta = diff_marks(old_df.get('Roll No'), old_df['Marks'], df.get('Roll No'), df['Marks'])
+                state['df'] = df
+                if not delta_size(delta):
+                    print(f"{path}: saved, no mark changes")
+                    continue
+
+                state['counts'] += grade_counts(np.concatenate([delta['new_marks'], df['Marks'].to_numpy()[delta['added']]]))
+                state['counts'] -= grade_counts(np.concatenate([delta['old_marks'], old_df['Marks'].to_numpy()[delta['removed']]]))
+                delta_file = delta_path(state['output'])
+                write_frame(delta_frame(old_df, df, delta, scheme), delta_file, output_format)
+                if rewrite_output:
+                    write_frame(df.assign(Grade=grade_marks(df['Marks'], scheme)), state['output'], output_format)
+            except Exception as e:
+                print(f"FAILED {path}: {e}", file=sys.stderr)
+                continue
+
+            print(f"{path}: {len(delta['changed'])} changed, {len(delta['added'])} added, {len(delta['removed'])} removed "
+                  f"-> {delta_file} ({time.perf_counter() - start:.2f}s)")
+            print("  " + "  ".join(f"{grade.strip()} {count}" for grade, count in zip(scheme.categories, state['counts'])))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grade many marks files in parallel.")
+    parser.add_argument('inputs', nargs='+', help="Marks files, directories or glob patterns.")
+    scheme_group = parser.add_mutually_exclusive_group()
+    scheme_group.add_argument('--handles', type=parse_handles,
+                              help="Nine desktop handle values, e.g. 0,15,25,40,50,65,75,85,95.")
+    scheme_group.add_argument('--cutoffs', type=parse_cutoffs,
+                              help="Web app minimum marks per grade, e.g. A=85,B=75,C=60,D=50.")
+    parser.add_argument('--max-marks', type=float, default=100, help="Upper edge for --handles (default 100).")
+    parser.add_argument('--output-dir', default='graded')
+    parser.add_argument('--format', choices=list(EXPORT_FORMATS), default='xlsx')
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--all-sheets', action='store_true',
+                        help="Grade every sheet of each workbook as its own section, one sheet per worker.")
+    parser.add_argument('--stream', action='store_true',
+                        help="Grade chunk by chunk without loading whole files (xlsx, csv and parquet).")
+    parser.add_argument('--chunk-rows', type=int, default=STREAM_CHUNK_ROWS, help="Rows per chunk with --stream.")
+    parser.add_argument('--watch', action='store_true',
+                        help="Keep running and write a delta file of changed students each time an input file is saved.")
+    parser.add_argument('--interval', type=float, default=1.0, help="Seconds between checks with --watch.")
+    parser.add_argument('--rewrite-output', action='store_true', help="With --watch, also rewrite the full graded file.")
+    args = parser.parse_args(argv)
+    if args.watch and (args.stream or args.all_sheets):
+        parser.error("--watch cannot be combined with --stream or --all-sheets.")
+
+    if args.handles:
+        scheme = GradingScheme.from_handles(args.handles, args.max_marks)
+    else:
+        scheme = GradingScheme.from_cutoffs(args.cutoffs or DEFAULT_CUTOFFS)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    files = find_marks_files(args.inputs, exclude_dir=os.path.abspath(args.output_dir))
+    if not files:
+        print("No marks files found.", file=sys.stderr)
+        return 1
+
+    if args.watch:
+        try:
+            return watch_files(files, scheme, args.output_dir, args.format, args.interval, args.rewrite_output)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        except KeyboardInterrupt:
+            return 0
+
+    start = time.perf_counter()
+    jobs = []
+    for path in files:
+        if args.all_sheets and detect_format(path) == 'xlsx':
+            jobs.extend((path, sheet) for sheet in list_sheets(path))
+        else:
+            jobs.append((path, None))
+
+    try:
+        stems = output_stems(jobs)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+
+    results = []
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        futures = [executor.submit(grade_file, path, scheme, args.output_dir, args.format, sheet, args.stream, args.chunk_rows,
+                                   stems[(path, sheet)])
+                   for path, sheet in jobs]
+        for future in as_completed(futures):
+            result = future.result()
+            results.append(result)
+            name = result['file'] if result['sheet'] is None else f"{result['file']} [{result['sheet']}]"
+            if 'error' in result:
+                print(f"FAILED {name}: {result['error']}", file=sys.stderr)
+            else:
+                print(f"graded {name} ({result['students']} students, {result['seconds']}s)")
+    elapsed = time.perf_counter() - start
+
+    columns = ['file', 'sheet', 'output', 'students', 'mean'] + [grade.strip() for grade in scheme.categories] + ['seconds', 'error']
+    summary = pd.DataFrame(results).reindex(columns=columns).sort_values(['file', 'sheet'])
+    summary_file = os.path.join(args.output_dir, 'summary.csv')
+    summary.to_csv(summary_file, index=False)
+
+    failed = int(summary['error'].notna().sum())
+    print(f"{len(jobs) - failed}/{len(jobs)} {'sheets' if args.all_sheets else 'files'} graded in {elapsed:.2f}s "
+          f"({len(jobs) / elapsed:.1f} files/sec, {args.workers} workers); summary: {summary_file}")
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,91 @@
+# Throughput of the vectorized grading engine against the per-row .apply path
+# that Grading_tool.py and app.py used before.
+#
+#   python benchmarks/bench_grading.py
+#   python benchmarks/bench_grading.py --sizes 10000 1000000 --skip-apply-above 1000000
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from grading_core import GradingScheme, grade_marks
+
+CRITERIA = {
+    'F  ': '0.00-15.00', 'E  ': '15.00-25.00', 'D  ': '25.00-40.00',
+    'C- ': '40.00-50.00', 'C  ': '50.00-65.00', 'B- ': '65.00-75.00',
+    'B  ': '75.00-85.00', 'A- ': '85.00-95.00', 'A  ': '95.00-100.00',
+}
+CUTOFFS = {'A': 85.0, 'B': 75.0, 'C': 60.0, 'D': 50.0}
+
+
+def legacy_range_grade(marks):
+    for grade, range_str in CRITERIA.items():
+        lower_bound, upper_bound = map(float, range_str.split('-'))
+        if lower_bound < marks <= upper_bound:
+            return grade
+    return 'No Grade'
+
+
+def legacy_cutoff_grade(marks):
+    if marks >= CUTOFFS['A']:
+        return 'A'
+    elif marks >= CUTOFFS['B']:
+        return 'B'
+    elif marks >= CUTOFFS['C']:
+        return 'C'
+    elif marks >= CUTOFFS['D']:
+        return 'D'
+    else:
+        return 'F'
+
+
+def best_of(func, repeat):
+    timings = []
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        timings.append(time.perf_counter() - start)
+    return min(timings), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vectorized grading against the .apply path.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 1_000_000, 10_000_000])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--skip-apply-above', type=int, default=None,
+                        help="Skip the slow .apply path for sizes above this row count.")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    schemes = [
+        ('ranges', GradingScheme.from_ranges(CRITERIA), legacy_range_grade),
+        ('cutoffs', GradingScheme.from_cutoffs(CUTOFFS), legacy_cutoff_grade),
+    ]
+
+    print(f"{'scheme':<8} {'rows':>11} {'apply (s)':>10} {'vector (s)':>11} {'rows/s':>14} {'speedup':>9}")
+    for size in args.sizes:
+        marks = pd.Series(np.round(rng.uniform(0, 100, size), 2), name='Marks')
+        for name, scheme, legacy in schemes:
+            vector_time, graded = best_of(lambda: grade_marks(marks, scheme), args.repeat)
+
+            if args.skip_apply_above is not None and size > args.skip_apply_above:
+                apply_cell, speedup_cell = '-', '-'
+            else:
+                apply_time, expected = best_of(lambda: marks.apply(legacy), 1)
+                if not (graded.astype(str) == expected).all():
+                    raise SystemExit(f"Vectorized grades differ from the .apply path for {name} at {size} rows.")
+                apply_cell = f"{apply_time:.3f}"
+                speedup_cell = f"{apply_time / vector_time:.0f}x"
+
+            print(f"{name:<8} {size:>11,} {apply_cell:>10} {vector_time:>11.4f} "
+                  f"{size / vector_time:>14,.0f} {speedup_cell:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,233 @@
+# End-to-end benchmark on synthetic cohorts: ingest, grading, binning,
+# grade-table aggregation, xlsx export and desktop drag latency. Results are
+# written as JSON; pass an earlier result file to --compare to spot regressions.
+#
+#   python benchmarks/bench_suite.py --sizes 10000 1000000 --output bench.json
+#   python benchmarks/bench_suite.py --compare bench.json --output bench_new.json
+#
+# The drag stage drives MultiHandleSliderApp in a withdrawn Tk root and needs
+# a display (or Xvfb); without one it is recorded as skipped.
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import types
+
+import matplotlib
+matplotlib.use('Agg')
+
+import numpy as np
+import pandas as pd
+
+REPO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, REPO_DIR)
+
+from cohort import DISTRIBUTIONS, make_cohort
+from grading_core import DEFAULT_HANDLES, FineHistogram, GradingScheme, MarksIndex, grade_marks
+from grading_io import HAS_PYARROW, read_marks, stream_grade, write_frame
+
+# Excel sheets stop at 1,048,576 rows.
+XLSX_ROW_LIMIT = 1_048_575
+
+
+def run_stage(func, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return {'best_s': min(timings), 'median_s': float(np.median(timings)), 'runs': repeat}
+
+
+def check_stream(path, scheme, workdir, chunk_rows):
+    # Streamed grading must write the same rows as grading the loaded file.
+    # Both are written as CSV and read back, so only values are compared.
+    loaded = read_marks(path)
+    loaded_path, streamed_path = os.path.join(workdir, 'loaded.csv'), os.path.join(workdir, 'streamed.csv')
+    write_frame(loaded.assign(Grade=grade_marks(loaded['Marks'], scheme)), loaded_path, 'csv')
+    stream_grade(path, scheme, streamed_path, 'csv', chunk_rows=chunk_rows)
+    pd.testing.assert_frame_equal(pd.read_csv(streamed_path), pd.read_csv(loaded_path), obj=f"streamed {os.path.basename(path)}")
+
+
+def bench_data_stages(df, repeat, max_xlsx_rows, workdir):
+    rows = len(df)
+    marks = df['Marks']
+    scheme = GradingScheme.from_handles(DEFAULT_HANDLES)
+    edges = sorted(DEFAULT_HANDLES + [100])
+    results = {}
+
+    csv_path = os.path.join(workdir, 'cohort.csv')
+    df.to_csv(csv_path, index=False)
+    results['ingest_csv'] = run_stage(lambda: read_marks(csv_path), repeat)
+    if HAS_PYARROW:
+        parquet_path = os.path.join(workdir, 'cohort.parquet')
+        df.to_parquet(parquet_path, index=False)
+        results['ingest_parquet'] = run_stage(lambda: read_marks(parquet_path), repeat)
+
+    stream_path = os.path.join(workdir, 'streamed.csv')
+    results['stream_csv'] = run_stage(lambda: stream_grade(csv_path, scheme, stream_path, 'csv'), repeat)
+    check_stream(csv_path, scheme, workdir, chunk_rows=max(rows // 7, 1))
+
+    results['grade'] = run_stage(lambda: grade_marks(marks, scheme), repeat)
+    graded = df.assign(Grade=grade_marks(marks, scheme))
+
+    index = MarksIndex(marks.to_numpy())
+    results['index_build'] = run_stage(lambda: MarksIndex(marks.to_numpy()), repeat)
+    results['bin_counts'] = run_stage(lambda: index.bin_counts(edges), repeat)
+    results['fine_histogram'] = run_stage(lambda: FineHistogram(marks.to_numpy()), repeat)
+
+    # Counts and percentages per grade, as both UIs' grade tables show them.
+    def aggregate():
+        counts = graded['Grade'].value_counts(sort=False)
+        return pd.DataFrame({'Students': counts, 'Percentage (%)': (counts / counts.sum() * 100).round(2)})
+    results['aggregate'] = run_stage(aggregate, repeat)
+
+    # The same counts plus per-grade means, mean, median and std from the
+    # index, rebuilding its prefix sums (done once per dataset in the apps).
+    def index_stats():
+        index.sums = None
+        return index.grade_stats(scheme), index.summary()
+    results['index_stats'] = run_stage(index_stats, repeat)
+
+    if rows <= min(max_xlsx_rows, XLSX_ROW_LIMIT):
+        xlsx_path = os.path.join(workdir, 'graded.xlsx')
+        results['export_xlsx'] = run_stage(lambda: write_frame(graded, xlsx_path, 'xlsx'), repeat)
+        results['ingest_xlsx'] = run_stage(lambda: read_marks(xlsx_path), repeat)
+        check_stream(xlsx_path, scheme, workdir, chunk_rows=max(rows // 7, 1))
+    else:
+        results['export_xlsx'] = results['ingest_xlsx'] = {'skipped': f"more than {max_xlsx_rows:,} rows"}
+
+    for stage in results.values():
+        if 'best_s' in stage:
+            stage['rows_per_s'] = rows / stage['best_s'] if stage['best_s'] else None
+    return results
+
+
+def bench_drag(marks, events, seed=1):
+    # Per-event latency of a drag on the C handle: on_drag plus the idle
+    # histogram/table update and redraw it schedules.
+    try:
+        import tkinter as tk
+        root = tk.Tk()
+    except Exception as e:
+        return {'skipped': f"no display ({e})"}
+
+    from Grading_tool import MultiHandleSliderApp
+
+    root.withdraw()
+    try:
+        app = MultiHandleSliderApp(root)
+        app.set_data(pd.Series(marks, name='Marks'))
+        root.update()
+
+        handle = app.handles[4]
+        event = types.SimpleNamespace(widget=app.slider_canvas, x=0, y=25)
+        app.drag_data = {'handle': handle, 'start_x': 0}
+        steps = np.random.default_rng(seed).integers(-15, 16, events)
+        latencies = []
+        for dx in steps:
+            event.x = app.drag_data['start_x'] + dx
+            start = time.perf_counter()
+            app.on_drag(event)
+            root.update()
+            latencies.append(time.perf_counter() - start)
+        app.on_release(event)
+    finally:
+        root.destroy()
+
+    latencies_ms = np.asarray(latencies) * 1000
+    return {
+        'events': int(events),
+        'p50_ms': float(np.percentile(latencies_ms, 50)),
+        'p95_ms': float(np.percentile(latencies_ms, 95)),
+        'max_ms': float(latencies_ms.max()),
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': pd.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def compare(results, baseline_path):
+    # Ratio of best time (p50 for drag) per stage against an earlier run; > 1 is slower.
+    with open(baseline_path, encoding='utf-8') as handle:
+        baseline = json.load(handle)
+    previous = {(run['rows'], run['distribution']): run['stages'] for run in baseline['runs']}
+
+    print(f"\n{'rows':>11} {'distribution':<12} {'stage':<16} {'before':>10} {'now':>10} {'ratio':>7}")
+    for run in results['runs']:
+        old_stages = previous.get((run['rows'], run['distribution']), {})
+        for stage, stat in run['stages'].items():
+            metric = 'best_s' if 'best_s' in stat else 'p50_ms'
+            old = old_stages.get(stage, {})
+            if metric in stat and old.get(metric):
+                print(f"{run['rows']:>11,} {run['distribution']:<12} {stage:<16} "
+                      f"{old[metric]:>10.4f} {stat[metric]:>10.4f} {stat[metric] / old[metric]:>6.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every grading stage on synthetic cohorts.")
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10_000, 100_000, 1_000_000])
+    parser.add_argument('--distributions', nargs='+', choices=DISTRIBUTIONS, default=['normal'])
+    parser.add_argument('--decimals', type=int, default=2, help="Mark precision; fewer decimals means more ties.")
+    parser.add_argument('--nan-fraction', type=float, default=0.0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--max-xlsx-rows', type=int, default=200_000,
+                        help="Skip the xlsx export/ingest stages above this row count.")
+    parser.add_argument('--drag-events', type=int, default=500, help="0 skips the desktop drag stage.")
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--compare', help="Earlier result file to compare against.")
+    args = parser.parse_args()
+
+    results = {'environment': environment(), 'settings': vars(args).copy(), 'runs': []}
+    # The sample workbook's sheet dimension runs past its last student.
+    sample = os.path.join(REPO_DIR, 'Marks for Grading.xlsx')
+    if os.path.exists(sample):
+        with tempfile.TemporaryDirectory() as workdir:
+            check_stream(sample, GradingScheme.from_handles(DEFAULT_HANDLES), workdir, chunk_rows=50)
+
+    print(f"{'rows':>11} {'distribution':<12} {'stage':<16} {'best (s)':>10} {'rows/s':>14}")
+    with tempfile.TemporaryDirectory() as workdir:
+        for distribution in args.distributions:
+            for size in args.sizes:
+                df = make_cohort(size, distribution, args.decimals, args.nan_fraction)
+                stages = bench_data_stages(df, args.repeat, args.max_xlsx_rows, workdir)
+                if args.drag_events:
+                    stages['drag'] = bench_drag(df['Marks'].to_numpy(), args.drag_events)
+                results['runs'].append({'rows': size, 'distribution': distribution, 'stages': stages})
+
+                for stage, stat in stages.items():
+                    if 'best_s' in stat:
+                        print(f"{size:>11,} {distribution:<12} {stage:<16} {stat['best_s']:>10.4f} {stat['rows_per_s']:>14,.0f}")
+                    elif 'p50_ms' in stat:
+                        print(f"{size:>11,} {distribution:<12} {stage:<16} p50 {stat['p50_ms']:.2f} ms, p95 {stat['p95_ms']:.2f} ms")
+                    else:
+                        print(f"{size:>11,} {distribution:<12} {stage:<16} skipped: {stat['skipped']}")
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump(results, handle, indent=1)
+    print(f"\nresults: {args.output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+# Synthetic marks files for benchmarks and manual testing, in the same
+# SNo / Roll No / Name / Marks layout as "Marks for Grading.xlsx".
+#
+#   python benchmarks/cohort.py 100000 --out cohort.csv
+#   python benchmarks/cohort.py 1000000 --distribution bimodal --decimals 0 --nan-fraction 0.01 --out cohort.parquet
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from grading_io import EXPORT_FORMATS, write_frame
+
+DISTRIBUTIONS = ('normal', 'uniform', 'bimodal', 'skewed')
+
+
+def make_marks(rows, distribution='normal', decimals=2, nan_fraction=0.0, seed=0, max_marks=100.0):
+    # Fewer decimals means more ties; nan_fraction of the marks are left blank.
+    rng = np.random.default_rng(seed)
+    if distribution == 'normal':
+        marks = rng.normal(0.6, 0.15, rows)
+    elif distribution == 'uniform':
+        marks = rng.uniform(0, 1, rows)
+    elif distribution == 'bimodal':
+        marks = np.where(rng.random(rows) < 0.4, rng.normal(0.45, 0.1, rows), rng.normal(0.75, 0.08, rows))
+    elif distribution == 'skewed':
+        marks = rng.beta(5, 2, rows)
+    else:
+        raise ValueError(f"Unknown distribution: {distribution}")
+
+    marks = np.round(np.clip(marks, 0, 1) * max_marks, decimals)
+    if nan_fraction:
+        marks[rng.random(rows) < nan_fraction] = np.nan
+    return marks
+
+
+def make_cohort(rows, distribution='normal', decimals=2, nan_fraction=0.0, seed=0, max_marks=100.0):
+    numbers = np.arange(1, rows + 1)
+    return pd.DataFrame({
+        'SNo': numbers,
+        'Roll No': pd.Series(numbers).map('R{:08d}'.format),
+        'Name': pd.Series(numbers).map('Student {}'.format),
+        'Marks': make_marks(rows, distribution, decimals, nan_fraction, seed, max_marks),
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic marks file.")
+    parser.add_argument('rows', type=int)
+    parser.add_argument('--out', required=True, help="Output file; the extension picks xlsx, csv or parquet.")
+    parser.add_argument('--distribution', choices=DISTRIBUTIONS, default='normal')
+    parser.add_argument('--decimals', type=int, default=2)
+    parser.add_argument('--nan-fraction', type=float, default=0.0)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    fmt = os.path.splitext(args.out)[1].lower().lstrip('.')
+    if fmt not in EXPORT_FORMATS:
+        parser.error(f"--out must end in one of: {', '.join('.' + name for name in EXPORT_FORMATS)}")
+
+    df = make_cohort(args.rows, args.distribution, args.decimals, args.nan_fraction, args.seed)
+    write_frame(df, args.out, fmt, sheet_name='Sheet1')
+    print(f"wrote {len(df):,} students to {args.out}")
+
+
+if __name__ == '__main__':
+    main()
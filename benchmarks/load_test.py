@@ -0,0 +1,125 @@
+# Load test for the grading API (server.py): uploads synthetic cohorts, then
+# many concurrent clients post random boundaries to /grade (and optionally
+# /export) and the script reports requests/sec and latency percentiles.
+#
+#   python benchmarks/load_test.py --spawn --clients 16 --requests 2000
+#   python benchmarks/load_test.py --url http://localhost:8000 --files 4 --export-every 50
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, '..'))
+
+from cohort import make_cohort
+
+
+def post(url, body, content_type='application/json', timeout=120):
+    request = urllib.request.Request(url, data=body, headers={'Content-Type': content_type}, method='POST')
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return response.read()
+
+
+def wait_for_server(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f"{url}/health", timeout=2):
+                return
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.2)
+    raise SystemExit(f"The grading API at {url} did not come up.")
+
+
+def random_payload(rng, file_hash, export_format=None):
+    a = float(rng.uniform(80, 95))
+    b = float(rng.uniform(65, a))
+    c = float(rng.uniform(50, b))
+    d = float(rng.uniform(35, c))
+    payload = {'file_hash': file_hash, 'cutoffs': {'A': round(a, 1), 'B': round(b, 1), 'C': round(c, 1), 'D': round(d, 1)}}
+    if export_format:
+        payload['format'] = export_format
+    return payload
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the grading HTTP API.")
+    parser.add_argument('--url', default='http://127.0.0.1:8000')
+    parser.add_argument('--spawn', action='store_true', help="Start server.py locally for the run.")
+    parser.add_argument('--files', type=int, default=4, help="Distinct synthetic cohorts to upload.")
+    parser.add_argument('--students', type=int, default=50_000)
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--requests', type=int, default=1000)
+    parser.add_argument('--export-every', type=int, default=0,
+                        help="Make every Nth request a CSV /export instead of /grade (0 = never).")
+    parser.add_argument('--output', help="Write the results as JSON to this file.")
+    args = parser.parse_args()
+
+    server = None
+    if args.spawn:
+        port = args.url.rsplit(':', 1)[-1].strip('/')
+        server = subprocess.Popen([sys.executable, os.path.join(BENCHMARKS_DIR, '..', 'server.py'), '--port', port, '--quiet'])
+    try:
+        wait_for_server(args.url)
+
+        start = time.perf_counter()
+        hashes = []
+        for seed in range(args.files):
+            content = make_cohort(args.students, seed=seed).to_csv(index=False).encode('utf-8')
+            response = post(f"{args.url}/marks?name=cohort_{seed}.csv", content, 'text/csv')
+            hashes.append(json.loads(response)['file_hash'])
+        upload_s = time.perf_counter() - start
+        print(f"uploaded {args.files} files of {args.students:,} students in {upload_s:.2f}s")
+
+        def one_request(i):
+            rng = np.random.default_rng(i)
+            file_hash = hashes[i % len(hashes)]
+            is_export = args.export_every and i % args.export_every == 0
+            endpoint = 'export' if is_export else 'grade'
+            payload = random_payload(rng, file_hash, 'csv' if is_export else None)
+            started = time.perf_counter()
+            try:
+                post(f"{args.url}/{endpoint}", json.dumps(payload).encode('utf-8'))
+                ok = True
+            except (urllib.error.URLError, ConnectionError, TimeoutError):
+                ok = False
+            return endpoint, time.perf_counter() - started, ok
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.clients) as pool:
+            results = list(pool.map(one_request, range(args.requests)))
+        elapsed = time.perf_counter() - start
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    summary = {'requests': args.requests, 'clients': args.clients, 'seconds': elapsed,
+               'requests_per_s': args.requests / elapsed, 'errors': sum(not ok for _, _, ok in results)}
+    for endpoint in ('grade', 'export'):
+        latencies = np.asarray([latency for name, latency, ok in results if name == endpoint and ok]) * 1000
+        if len(latencies):
+            summary[endpoint] = {'count': len(latencies), 'p50_ms': float(np.percentile(latencies, 50)),
+                                 'p95_ms': float(np.percentile(latencies, 95)), 'max_ms': float(latencies.max())}
+
+    print(f"{args.requests} requests from {args.clients} clients in {elapsed:.2f}s: "
+          f"{summary['requests_per_s']:.0f} req/s, {summary['errors']} errors")
+    for endpoint in ('grade', 'export'):
+        if endpoint in summary:
+            stat = summary[endpoint]
+            print(f"  /{endpoint:<7} n={stat['count']:<6} p50 {stat['p50_ms']:.1f} ms   p95 {stat['p95_ms']:.1f} ms   max {stat['max_ms']:.1f} ms")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as handle:
+            json.dump(summary, handle, indent=1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,92 @@
+# Soak check for the desktop slider: drives thousands of synthetic drag events
+# through MultiHandleSliderApp and fails if the slider canvas item count or the
+# process RSS keeps growing. Needs a display (or Xvfb).
+#
+#   python benchmarks/soak_slider.py --students 5000 --events 5000
+import argparse
+import os
+import resource
+import sys
+import time
+import types
+
+import matplotlib
+matplotlib.use('TkAgg')
+
+import numpy as np
+import pandas as pd
+import tkinter as tk
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+
+from Grading_tool import MultiHandleSliderApp
+
+
+def current_rss_mb():
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 2**20
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def drag(app, handle_index, steps):
+    handle = app.handles[handle_index]
+    event = types.SimpleNamespace(widget=app.slider_canvas, x=0, y=25)
+    app.drag_data = {'handle': handle, 'start_x': 0}
+    for dx in steps:
+        event.x = app.drag_data['start_x'] + dx
+        app.on_drag(event)
+        app.root.update()
+    app.on_release(event)
+    app.root.update()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Soak the desktop slider with synthetic drag events.")
+    parser.add_argument('--students', type=int, default=5000)
+    parser.add_argument('--events', type=int, default=5000)
+    parser.add_argument('--rss-tolerance-mb', type=float, default=20.0)
+    args = parser.parse_args()
+
+    root = tk.Tk()
+    root.withdraw()
+    app = MultiHandleSliderApp(root)
+
+    rng = np.random.default_rng(0)
+    app.set_data(pd.Series(np.round(rng.normal(60, 15, args.students).clip(0, 100), 2), name='Marks'))
+
+    rng_steps = np.random.default_rng(1)
+    warmup = rng_steps.integers(-15, 16, 200)
+    drag(app, 4, warmup)
+    drag(app, 4, -warmup)
+
+    baseline_items = len(app.slider_canvas.find_all())
+    baseline_rss = current_rss_mb()
+
+    start = time.perf_counter()
+    done = 0
+    while done < args.events:
+        steps = rng_steps.integers(-15, 16, 100)
+        handle_index = int(rng_steps.integers(1, app.num_handles - 1))
+        drag(app, handle_index, steps)
+        drag(app, handle_index, -steps)
+        done += 2 * len(steps)
+    elapsed = time.perf_counter() - start
+
+    items = len(app.slider_canvas.find_all())
+    rss = current_rss_mb()
+    root.destroy()
+
+    print(f"events: {done}  avg frame: {elapsed / done * 1000:.2f} ms")
+    print(f"canvas items: {baseline_items} -> {items}")
+    print(f"rss: {baseline_rss:.1f} MB -> {rss:.1f} MB")
+
+    if items != baseline_items:
+        raise SystemExit("Slider canvas item count grew during the soak run.")
+    if rss - baseline_rss > args.rss_tolerance_mb:
+        raise SystemExit(f"RSS grew by more than {args.rss_tolerance_mb} MB during the soak run.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,136 @@
+# Startup time of both front-ends, each measured in fresh interpreters:
+#   - import cost of the entry modules (python -X importtime) and the
+#     slowest modules each one pulls in directly
+#   - time to first window: Grading_tool's main window built and drawn once
+#     (needs a display or Xvfb; skipped without one)
+#   - time to first render: app.py's script run up to the upload widget, and
+#     the whole first run before any upload
+#
+#   python benchmarks/startup.py --repeat 5 --output startup.json
+#   python benchmarks/startup.py --compare startup.json
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+import numpy as np
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.abspath(os.path.join(BENCHMARKS_DIR, '..'))
+
+ENTRY_MODULES = ['Grading_tool', 'grading_core', 'grading_io']
+
+FIRST_WINDOW = """
+import time
+start = time.perf_counter()
+import tkinter as tk
+from Grading_tool import MultiHandleSliderApp
+root = tk.Tk()
+app = MultiHandleSliderApp(root)
+root.update()
+print(time.perf_counter() - start)
+app.on_close()
+"""
+
+# Streamlit itself is already running when a browser connects, so only the
+# script is timed: until the upload widget renders, and the whole first run.
+FIRST_RENDER = """
+import runpy
+import time
+import streamlit as st
+reached = []
+def file_uploader(*args, **kwargs):
+    reached.append(time.perf_counter())
+st.file_uploader = file_uploader
+start = time.perf_counter()
+runpy.run_path({app!r}, run_name='__main__')
+print(time.perf_counter() - start)
+print(reached[0] - start)
+"""
+
+
+def run_python(args):
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, PYTHONDONTWRITEBYTECODE='1')
+    return subprocess.run([sys.executable] + args, capture_output=True, text=True, cwd=REPO_DIR, env=env)
+
+
+def import_times(module, top=8):
+    # Total import time of `module`, and its direct imports by cumulative time.
+    result = run_python(['-X', 'importtime', '-c', f'import {module}'])
+    if result.returncode:
+        return {'skipped': result.stderr.strip().splitlines()[-1]}
+
+    total, children = None, []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip())) // 2
+        if name.strip() == module and depth == 0:
+            total = int(cumulative) / 1000
+        elif depth == 1:
+            children.append((name.strip(), int(cumulative) / 1000))
+    children.sort(key=lambda child: child[1], reverse=True)
+    return {'import_ms': total, 'slowest': dict(children[:top])}
+
+
+def timed_runs(script, repeat, stages):
+    # The script prints one elapsed time in seconds per stage.
+    timings = {stage: [] for stage in stages}
+    for _ in range(repeat):
+        result = run_python(['-c', script])
+        if result.returncode:
+            return {stage: {'skipped': result.stderr.strip().splitlines()[-1]} for stage in stages}
+        for stage, line in zip(stages, result.stdout.strip().splitlines()[-len(stages):]):
+            timings[stage].append(float(line) * 1000)
+    return {stage: {'best_ms': min(values), 'median_ms': float(np.median(values)), 'runs': repeat}
+            for stage, values in timings.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure import and startup time of the desktop and web apps.")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output', default='startup_results.json')
+    parser.add_argument('--compare', help="Earlier result file to compare against.")
+    args = parser.parse_args()
+
+    results = {'imports': {}, 'startup': {}}
+    for module in ENTRY_MODULES:
+        runs = [import_times(module) for _ in range(args.repeat)]
+        if 'skipped' in runs[0]:
+            results['imports'][module] = runs[0]
+            continue
+        best = min(runs, key=lambda run: run['import_ms'])
+        results['imports'][module] = best
+        print(f"import {module:<14} {best['import_ms']:>8.1f} ms   "
+              + ", ".join(f"{name} {ms:.0f}" for name, ms in list(best['slowest'].items())[:4]))
+
+    results['startup'].update(timed_runs(FIRST_WINDOW, args.repeat, ['first_window']))
+    results['startup'].update(timed_runs(FIRST_RENDER.format(app=os.path.join(REPO_DIR, 'app.py')), args.repeat,
+                                         ['first_run', 'first_render']))
+    for stage, stat in results['startup'].items():
+        if 'best_ms' in stat:
+            print(f"{stage:<21} {stat['best_ms']:>8.1f} ms   (median {stat['median_ms']:.1f} ms)")
+        else:
+            print(f"{stage:<21} skipped: {stat['skipped']}")
+
+    with open(args.output, 'w', encoding='utf-8') as handle:
+        json.dump(results, handle, indent=1)
+    print(f"\nresults: {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as handle:
+            baseline = json.load(handle)
+        print(f"\n{'stage':<21} {'before':>10} {'now':>10} {'ratio':>7}")
+        rows = [(f"import {module}", stat.get('import_ms'), baseline['imports'].get(module, {}).get('import_ms'))
+                for module, stat in results['imports'].items()]
+        rows += [(stage, stat.get('best_ms'), baseline['startup'].get(stage, {}).get('best_ms'))
+                 for stage, stat in results['startup'].items()]
+        for stage, now, before in rows:
+            if now and before:
+                print(f"{stage:<21} {before:>10.1f} {now:>10.1f} {now / before:>6.2f}x")
+
+
+if __name__ == '__main__':
+    main()
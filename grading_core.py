@@ -0,0 +1,737 @@
+import copy
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+# pandas is imported where grades are built, so the desktop window can open
+# before it has loaded.
+NO_GRADE = 'No Grade'
+
+# Desktop nine-handle scheme and web four-cutoff scheme defaults.
+HANDLE_GRADES = ['F  ', 'E  ', 'D  ', 'C- ', 'C  ', 'B- ', 'B  ', 'A- ', 'A  ']
+DEFAULT_HANDLES = [0, 15, 25, 40, 50, 65, 75, 85, 95]
+DEFAULT_CUTOFFS = {'A': 85.0, 'B': 75.0, 'C': 60.0, 'D': 50.0}
+
+# Grades the desktop table adds up in its "%age Consecutive Grades" column.
+HANDLE_GRADE_GROUPS = [['F  ', 'E  '], ['D  '], ['C- ', 'C  '], ['B- ', 'B  '], ['A- ', 'A  ']]
+
+# Grade points for the mean GPA of a scenario; grades not listed (No Grade) are left out.
+GRADE_POINTS = {'A': 10, 'A-': 9, 'B': 8, 'B-': 7, 'C': 6, 'C-': 5, 'D': 4, 'E': 2, 'F': 0}
+
+# Starting targets (% of students per grade) for the boundary optimizer.
+DEFAULT_HANDLE_TARGETS = [5, 10, 10, 15, 15, 15, 15, 10, 5]
+DEFAULT_CUTOFF_TARGETS = {'A': 15, 'B': 20, 'C': 30, 'D': 20, 'F': 15}
+
+
+class GradingScheme:
+    # Grade boundaries compiled once into a sorted edge array so a whole
+    # column can be graded with a single np.searchsorted pass.
+    # closed='right' grades (lower, upper], closed='left' grades [lower, upper).
+    def __init__(self, edges, labels, closed='right', default=NO_GRADE):
+        edges = np.asarray(edges, dtype=np.float64)
+        labels = list(labels)
+        if labels and len(edges) != len(labels) + 1:
+            raise ValueError("A grading scheme needs exactly one more edge than grades.")
+        if np.any(np.diff(edges) < 0):
+            raise ValueError("Grade boundaries must be in ascending order.")
+        if closed not in ('left', 'right'):
+            raise ValueError("closed must be 'left' or 'right'.")
+
+        self.edges = edges
+        self.labels = labels
+        self.closed = closed
+        self.default = default
+
+        self.categories = labels if default in labels else labels + [default]
+        self.default_code = self.categories.index(default)
+
+    @classmethod
+    def from_ranges(cls, criteria):
+        # Desktop scheme: {'F  ': '0.00-15.00', 'E  ': '15.00-25.00', ...},
+        # a mark belongs to the first range with lower < mark <= upper.
+        if not criteria:
+            return cls([], [])
+
+        parsed = []
+        for grade, range_str in criteria.items():
+            lower_bound, upper_bound = map(float, range_str.split('-'))
+            parsed.append((lower_bound, upper_bound, grade))
+        parsed.sort(key=lambda item: item[0])
+
+        for (_, upper, _), (lower, _, _) in zip(parsed, parsed[1:]):
+            if upper != lower:
+                raise ValueError("Grade ranges must be contiguous.")
+
+        edges = [lower for lower, _, _ in parsed] + [parsed[-1][1]]
+        return cls(edges, [grade for _, _, grade in parsed], closed='right')
+
+    @classmethod
+    def from_handles(cls, handle_values, max_value=100):
+        # Same ranges the desktop table shows for a set of handle values.
+        return cls.from_ranges(handle_ranges(handle_values, max_value))
+
+    @classmethod
+    def from_cutoffs(cls, cutoffs, fail_grade='F'):
+        # Web scheme: {'A': 85, 'B': 75, 'C': 60, 'D': 50}, highest grade first,
+        # a mark gets the highest grade whose minimum it reaches, else fail_grade.
+        grades = list(cutoffs)
+        effective = np.minimum.accumulate(np.asarray([cutoffs[g] for g in grades], dtype=np.float64))
+
+        edges = [-np.inf] + list(effective[::-1]) + [np.inf]
+        labels = [fail_grade] + grades[::-1]
+        return cls(edges, labels, closed='left', default=fail_grade)
+
+    @property
+    def boundaries(self):
+        return tuple(float(edge) for edge in self.edges)
+
+    @property
+    def key(self):
+        # Hashable identity for memoizing results per boundary set.
+        return (tuple(self.labels), self.boundaries, self.closed, self.default)
+
+    def grade_codes(self, marks):
+        marks = as_marks(marks)
+        if not self.labels:
+            return np.full(marks.shape, self.default_code, dtype=np.int8)
+
+        # Edges take the marks' precision, so a float32 mark equal to a
+        # boundary compares equal to it.
+        side = 'left' if self.closed == 'right' else 'right'
+        codes = np.searchsorted(self.edges.astype(marks.dtype), marks, side=side) - 1
+
+        outside = (codes < 0) | (codes >= len(self.labels)) | np.isnan(marks)
+        codes[outside] = self.default_code
+        return codes.astype(np.int8)
+
+    def grade(self, marks):
+        import pandas as pd
+        return pd.Categorical.from_codes(self.grade_codes(marks), categories=self.categories)
+
+
+def as_marks(marks):
+    # Float marks keep their dtype (float32 for loaded files); anything else becomes float64.
+    marks = np.asarray(marks)
+    return marks if marks.dtype.kind == 'f' else marks.astype(np.float64)
+
+
+def as_float(value):
+    # Python float with the shortest repr at the value's own precision,
+    # so a float32 53.17 comes back as 53.17 rather than 53.169998...
+    return float(str(value))
+
+
+def handle_ranges(handle_values, max_value=100):
+    edges = sorted(list(handle_values) + [max_value])
+    return {grade: f"{edges[i]:.2f}-{edges[i + 1]:.2f}" for i, grade in enumerate(HANDLE_GRADES)}
+
+
+def grade_groups(labels):
+    # Neighbouring grades that share a letter (B-, B, B+), for schemes
+    # without their own grouping.
+    groups = []
+    for label in labels:
+        if groups and groups[-1][0].strip()[:1] == label.strip()[:1]:
+            groups[-1].append(label)
+        else:
+            groups.append([label])
+    return groups
+
+
+def grade_table_rows(bin_edges, counts, labels=HANDLE_GRADES, groups=None, means=None):
+    # Rows of the desktop grade table: grade, range, students, % of students
+    # and the combined % of each group of consecutive grades, on the group's
+    # first row. With means, a mean mark column is added.
+    if groups is None:
+        groups = HANDLE_GRADE_GROUPS if list(labels) == HANDLE_GRADES else grade_groups(labels)
+    counts = np.asarray(counts)
+    total = counts.sum()
+    shares = counts / total * 100 if total else np.zeros(len(counts))
+
+    row_of = {label: i for i, label in enumerate(labels)}
+    consecutive = [""] * len(labels)
+    for group in groups:
+        consecutive[row_of[group[0]]] = f"{sum(shares[row_of[label]] for label in group):.2f}%"
+
+    rows = []
+    for i, label in enumerate(labels):
+        row = [label, f"{bin_edges[i]:.2f}-{bin_edges[i + 1]:.2f}", str(counts[i]), f"{shares[i]:.2f}%", consecutive[i]]
+        if means is not None:
+            row.append("" if np.isnan(means[i]) else f"{means[i]:.2f}")
+        rows.append(row)
+    return rows
+
+
+def grade_marks(marks, scheme):
+    import pandas as pd
+    grades = scheme.grade(marks)
+    if isinstance(marks, pd.Series):
+        return pd.Series(grades, index=marks.index, name='Grade')
+    return grades
+
+
+class MarksIndex:
+    # Marks sorted once at load time. np.searchsorted positions into the sorted
+    # array are prefix counts, so bin counts for any set of edges are O(log n).
+    # The sorted copy keeps the marks' dtype and edges are cast to it. With
+    # with_order, order[i] is the row of the i-th lowest mark, so any slice of
+    # the sorted marks maps back to students.
+    def __init__(self, marks, with_order=False):
+        marks = as_marks(marks)
+        missing = np.isnan(marks)
+        self.missing = int(missing.sum())
+        if with_order:
+            rows = np.flatnonzero(~missing)
+            self.order = rows[np.argsort(marks[rows], kind='stable')].astype(np.int32 if len(marks) < 2**31 else np.int64)
+            self.sorted = marks[self.order]
+        else:
+            self.order = None
+            self.sorted = np.sort(marks[~missing])
+        self.index_gaps()
+
+    def index_gaps(self):
+        self.sums = None
+        # Positions j where sorted[j - 1] < sorted[j], i.e. every place a
+        # cutoff can separate students, and the width of the gap there.
+        steps = np.diff(self.sorted)
+        self.gap_positions = np.flatnonzero(steps) + 1
+        self.gap_widths = steps[self.gap_positions - 1]
+        # Gaps closer in width than the marks' rounding error count as equal.
+        self.width_tolerance = 4 * np.finfo(self.sorted.dtype).eps * (float(np.abs(self.sorted).max()) if len(self.sorted) else 0.0)
+
+    def __len__(self):
+        return len(self.sorted)
+
+    def prefix_sums(self):
+        # Running sums of (mark - shift) and its square over the sorted marks,
+        # built on first use, so the count, sum and spread of any range of
+        # marks is two lookups. Shifting by the median keeps the squares well
+        # conditioned for the variance.
+        if self.sums is None:
+            shift = float(self.sorted[len(self.sorted) // 2]) if len(self.sorted) else 0.0
+            centred = self.sorted.astype(np.float64) - shift
+            self.sums = (shift, np.concatenate([[0.0], np.cumsum(centred)]), np.concatenate([[0.0], np.cumsum(centred ** 2)]))
+        return self.sums
+
+    def range_stats(self, starts, stops):
+        # Count, sum, mean and population std of sorted[start:stop] for (arrays
+        # of) positions; empty ranges have a nan mean and std.
+        shift, sums, squares = self.prefix_sums()
+        starts, stops = np.asarray(starts), np.asarray(stops)
+        counts = stops - starts
+        centred = sums[stops] - sums[starts]
+        with np.errstate(invalid='ignore', divide='ignore'):
+            means = centred / counts
+            variances = np.maximum((squares[stops] - squares[starts]) / counts - means ** 2, 0.0)
+        return counts, centred + shift * counts, shift + means, np.sqrt(variances)
+
+    def summary(self):
+        # Students with marks, mean, median and population std.
+        n = len(self.sorted)
+        if not n:
+            return {'students': 0, 'mean': float('nan'), 'median': float('nan'), 'std': float('nan')}
+        _, _, mean, std = self.range_stats(0, n)
+        median = (as_float(self.sorted[(n - 1) // 2]) + as_float(self.sorted[n // 2])) / 2
+        return {'students': n, 'mean': float(mean), 'median': median, 'std': float(std)}
+
+    def with_changes(self, rows, old_marks, new_marks):
+        # Index after the marks of `rows` changed from old_marks to new_marks,
+        # other rows unchanged: only those entries move in the sorted arrays,
+        # and ties stay in row order as a full stable sort leaves them. Needs with_order.
+        rows = np.asarray(rows, dtype=self.order.dtype)
+        old_marks = np.asarray(old_marks, dtype=self.sorted.dtype)
+        new_marks = np.asarray(new_marks, dtype=self.sorted.dtype)
+
+        keep = np.ones(len(self.sorted), dtype=bool)
+        for row, mark in zip(rows, old_marks):
+            if not np.isnan(mark):
+                lo, hi = np.searchsorted(self.sorted, mark, side='left'), np.searchsorted(self.sorted, mark, side='right')
+                keep[lo + np.searchsorted(self.order[lo:hi], row)] = False
+        sorted_marks, order = self.sorted[keep], self.order[keep]
+
+        valid = ~np.isnan(new_marks)
+        added = np.lexsort((rows[valid], new_marks[valid]))
+        add_rows, add_marks = rows[valid][added], new_marks[valid][added]
+        positions = np.empty(len(add_rows), dtype=np.int64)
+        for i, (row, mark) in enumerate(zip(add_rows, add_marks)):
+            lo, hi = np.searchsorted(sorted_marks, mark, side='left'), np.searchsorted(sorted_marks, mark, side='right')
+            positions[i] = lo + np.searchsorted(order[lo:hi], row)
+
+        index = MarksIndex.__new__(MarksIndex)
+        index.missing = self.missing + int(np.isnan(new_marks).sum()) - int(np.isnan(old_marks).sum())
+        index.sorted = np.insert(sorted_marks, positions, add_marks)
+        index.order = np.insert(order, positions, add_rows)
+        index.index_gaps()
+        return index
+
+    def position(self, edge, side='left'):
+        return int(np.searchsorted(self.sorted, self.sorted.dtype.type(edge), side=side))
+
+    def bin_positions(self, edges):
+        # Same binning as np.histogram: [lower, upper) with the last bin closed.
+        positions = np.searchsorted(self.sorted, np.asarray(edges, dtype=self.sorted.dtype), side='left')
+        if len(edges):
+            positions[-1] = self.position(edges[-1], side='right')
+        return positions
+
+    def bin_counts(self, edges):
+        return np.diff(self.bin_positions(edges))
+
+    def grade_positions(self, scheme):
+        # Positions of the scheme's edges with its own open/closed sides.
+        side = 'right' if scheme.closed == 'right' else 'left'
+        return np.searchsorted(self.sorted, scheme.edges.astype(self.sorted.dtype), side=side)
+
+    def grade_counts(self, scheme):
+        # Students per scheme category from len(edges) lookups; marks outside
+        # the edges and missing marks get the default grade, as in grade_codes.
+        counts = np.zeros(len(scheme.categories), dtype=np.int64)
+        if not scheme.labels:
+            counts[scheme.default_code] = len(self.sorted) + self.missing
+            return counts
+        positions = self.grade_positions(scheme)
+        counts[:len(scheme.labels)] = np.diff(positions)
+        counts[scheme.default_code] += len(self.sorted) - (positions[-1] - positions[0]) + self.missing
+        return counts
+
+    def grade_stats(self, scheme):
+        # Students, % of students and mean mark per scheme category from
+        # len(edges) lookups. Missing marks count toward the default grade
+        # (and the %s) but not its mean.
+        counts = self.grade_counts(scheme)
+        sums = np.zeros(len(scheme.categories))
+        present = np.zeros(len(scheme.categories), dtype=np.int64)
+        if scheme.labels:
+            positions = self.grade_positions(scheme)
+            present[:len(scheme.labels)], sums[:len(scheme.labels)], _, _ = self.range_stats(positions[:-1], positions[1:])
+            # Marks outside the outer edges get the default grade.
+            outside, outside_sums, _, _ = self.range_stats([0, positions[-1]], [positions[0], len(self.sorted)])
+            present[scheme.default_code] += outside.sum()
+            sums[scheme.default_code] += outside_sums.sum()
+        else:
+            present[scheme.default_code], sums[scheme.default_code], _, _ = self.range_stats(0, len(self.sorted))
+        return finish_grade_stats(counts, sums, present)
+
+    def count_between(self, lower, upper):
+        # Students with lower <= mark < upper.
+        return max(self.position(upper) - self.position(lower), 0)
+
+    def rank(self, marks):
+        # Competition rank of a mark (or array of marks): 1 + students with a strictly higher mark.
+        return len(self.sorted) - np.searchsorted(self.sorted, np.asarray(marks, dtype=self.sorted.dtype), side='right') + 1
+
+    def rows_between(self, lower, upper):
+        # Rows of the students with lower <= mark <= upper, lowest mark first. Needs with_order.
+        return self.order[self.position(lower):self.position(upper, side='right')]
+
+    def top_rows(self, k):
+        # Rows of the k highest marks, highest first. Needs with_order.
+        return self.order[len(self.order) - min(k, len(self.order)):][::-1]
+
+    def percentile(self, value):
+        # Share of students strictly below value.
+        if not len(self.sorted):
+            return 0.0
+        return 100.0 * self.position(value) / len(self.sorted)
+
+    def nearest_below(self, value):
+        # Highest mark <= value.
+        i = self.position(value, side='right')
+        return as_float(self.sorted[i - 1]) if i > 0 else None
+
+    def nearest_above(self, value):
+        # Lowest mark > value.
+        i = self.position(value, side='right')
+        return as_float(self.sorted[i]) if i < len(self.sorted) else None
+
+    def snap_to_gap(self, value, decimals=2):
+        # Middle of the gap between the marks either side of value, so the
+        # cutoff sits clear of every student.
+        below, above = self.nearest_below(value), self.nearest_above(value)
+        if below is None or above is None:
+            return None
+        return gap_value(below, above, decimals)
+
+    def fit_boundaries(self, shares, window=0.0, low=0.0, high=100.0, decimals=2):
+        # Cutoffs that split the students into the given shares, lowest grade
+        # first (shares need not sum to 100). Each cutoff starts at its
+        # quantile and moves to the widest gap between marks within
+        # +/- window percent of the students. Marks below low are left out of
+        # the shares, and every cutoff is kept within [low, high] and in
+        # order. Only distinct marks are searched, so a fit costs
+        # microseconds once the index is built.
+        n = len(self.sorted)
+        start = int(np.searchsorted(self.sorted, low, side='left'))
+        shares = np.asarray(shares, dtype=np.float64)
+        if start >= n or shares.sum() <= 0:
+            return [float(low)] * (len(shares) - 1)
+
+        graded = n - start
+        targets = start + np.rint(np.cumsum(shares)[:-1] / shares.sum() * graded).astype(np.int64)
+        spread = window / 100.0 * graded
+        positions = self.gap_positions
+        boundaries = []
+        previous = start
+        for target in targets:
+            if target <= previous:
+                boundaries.append(boundaries[-1] if boundaries else float(low))
+                continue
+            if target >= n:
+                boundaries.append(float(high))
+                previous = n
+                continue
+
+            first = max(np.searchsorted(positions, target - spread, side='left'),
+                        np.searchsorted(positions, previous, side='right'))
+            last = np.searchsorted(positions, target + spread, side='right')
+            if first < last:
+                widths = self.gap_widths[first:last]
+                widest = np.flatnonzero(widths >= widths.max() - self.width_tolerance) + first
+                chosen = widest[np.argmin(np.abs(positions[widest] - target))]
+            else:
+                # No gap in the window (ties at the quantile): nearest gap either side.
+                after = np.searchsorted(positions, target, side='left')
+                options = [i for i in (after - 1, after) if 0 <= i < len(positions) and positions[i] > previous]
+                if not options:
+                    boundaries.append(boundaries[-1] if boundaries else float(low))
+                    continue
+                chosen = min(options, key=lambda i: abs(positions[i] - target))
+
+            previous = int(positions[chosen])
+            value = gap_value(as_float(self.sorted[previous - 1]), as_float(self.sorted[previous]), decimals)
+            floor = boundaries[-1] if boundaries else float(low)
+            boundaries.append(min(max(value, floor), float(high)))
+        return boundaries
+
+
+def mean_grade_points(categories, counts, points=GRADE_POINTS):
+    graded = [(points[grade.strip()], count) for grade, count in zip(categories, counts) if grade.strip() in points]
+    students = sum(count for _, count in graded)
+    return sum(point * count for point, count in graded) / students if students else float('nan')
+
+
+def compare_schemes(index, old, new):
+    # Grade changes from old to new without regrading anyone. The mark line is
+    # cut at both schemes' edges; every piece has one grade under each scheme,
+    # so only pieces where those differ (the marks between differing cutoffs)
+    # are counted. Returns {'moves': {(old, new): students}, 'changed': total,
+    # 'slices': [(start, stop, old, new)]} with slices into index.sorted.
+    if old.categories != new.categories or old.closed != new.closed:
+        raise ValueError("Only scenarios on the same grading scale can be compared.")
+
+    cuts = np.union1d(old.edges, new.edges)
+    side = 'right' if old.closed == 'right' else 'left'
+    positions = np.searchsorted(index.sorted, cuts.astype(index.sorted.dtype), side=side)
+    # Each piece takes the grade of the edge it includes.
+    probes = cuts[1:] if old.closed == 'right' else cuts[:-1]
+    old_codes, new_codes = old.grade_codes(probes), new.grade_codes(probes)
+
+    moves = {}
+    slices = []
+    for start, stop, old_code, new_code in zip(positions[:-1], positions[1:], old_codes, new_codes):
+        if old_code != new_code and stop > start:
+            pair = (old.categories[old_code], new.categories[new_code])
+            moves[pair] = moves.get(pair, 0) + int(stop - start)
+            slices.append((int(start), int(stop)) + pair)
+    return {'moves': moves, 'changed': sum(moves.values()), 'slices': slices}
+
+
+class LRUCache:
+    # Thread-safe LRU cache; the least recently used entry goes once max_entries is reached.
+    def __init__(self, max_entries=128):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+        return value
+
+    def stats(self):
+        with self.lock:
+            return {'entries': len(self.entries), 'max_entries': self.max_entries, 'hits': self.hits, 'misses': self.misses}
+
+
+class ScenarioBook:
+    # Named boundary sets over one MarksIndex, shown side by side. Results
+    # and pairwise diffs are memoized by boundary content (LRU), so renaming
+    # or re-saving a scenario costs nothing.
+    def __init__(self, index, max_results=64):
+        self.index = index
+        self.scenarios = {}
+        self.cache = LRUCache(max_results)
+
+    def add(self, name, scheme):
+        self.scenarios[name] = scheme
+
+    def remove(self, name):
+        self.scenarios.pop(name, None)
+
+    def result(self, name):
+        scheme = self.scenarios[name]
+        result = self.cache.get(('result', scheme.key))
+        if result is None:
+            counts = self.index.grade_counts(scheme)
+            result = self.cache.put(('result', scheme.key), {
+                'counts': dict(zip(scheme.categories, counts.tolist())),
+                'mean_points': mean_grade_points(scheme.categories, counts),
+            })
+        return result
+
+    def diff(self, old_name, new_name):
+        old, new = self.scenarios[old_name], self.scenarios[new_name]
+        diff = self.cache.get(('diff', old.key, new.key))
+        if diff is None:
+            diff = dict(compare_schemes(self.index, old, new),
+                        points_shift=self.result(new_name)['mean_points'] - self.result(old_name)['mean_points'])
+            diff = self.cache.put(('diff', old.key, new.key), diff)
+        return diff
+
+    def changed_rows(self, diff):
+        # Row numbers (in the frame the index was built from) of the students
+        # in a diff, with their old and new grades. Needs with_order.
+        rows, old_grades, new_grades = [], [], []
+        for start, stop, old_grade, new_grade in diff['slices']:
+            rows.append(self.index.order[start:stop])
+            old_grades += [old_grade] * (stop - start)
+            new_grades += [new_grade] * (stop - start)
+        return (np.concatenate(rows) if rows else np.array([], dtype=np.int64)), old_grades, new_grades
+
+
+def finish_grade_stats(counts, sums, present):
+    # Shares and means from per-grade totals. Partial stats (one per section,
+    # say) merge by adding their counts, sums and present counts first.
+    total = counts.sum()
+    with np.errstate(invalid='ignore', divide='ignore'):
+        means = np.where(present > 0, sums / present, np.nan)
+    percentages = counts / total * 100 if total else np.zeros(len(counts))
+    return {'counts': counts, 'sums': sums, 'present': present, 'percentages': percentages, 'means': means}
+
+
+def merge_grade_stats(parts):
+    parts = list(parts)
+    return finish_grade_stats(sum(part['counts'] for part in parts), sum(part['sums'] for part in parts),
+                              sum(part['present'] for part in parts))
+
+
+def diff_marks(old_rolls, old_marks, new_rolls, new_marks):
+    # Changes between two loads of a marks file, matched by Roll No (by row
+    # when either load has none, or only blank ones). 'aligned' means the same
+    # roll numbers in the same order, so rows keep their positions; then only
+    # 'changed' is set. Blank roll numbers never match: in an unaligned
+    # reload those rows count as removed and added.
+    # changed/old_rows: new and old row of each student whose mark changed;
+    # added: new rows with no old match; removed: old rows with no new match.
+    import pandas as pd
+
+    old_marks, new_marks = as_marks(old_marks), as_marks(new_marks)
+    if old_rolls is not None and new_rolls is not None:
+        old_rolls, new_rolls = np.asarray(old_rolls, dtype=object), np.asarray(new_rolls, dtype=object)
+        old_missing, new_missing = pd.isna(old_rolls), pd.isna(new_rolls)
+        if old_missing.all() or new_missing.all():
+            old_rolls = new_rolls = None
+    if old_rolls is None or new_rolls is None:
+        aligned = len(old_marks) == len(new_marks)
+    else:
+        aligned = (len(old_rolls) == len(new_rolls) and bool((old_missing == new_missing).all())
+                   and bool((old_rolls[~old_missing] == new_rolls[~new_missing]).all()))
+
+    empty = np.array([], dtype=np.int64)
+    if aligned:
+        old_rows = np.arange(len(new_marks))
+        added = removed = empty
+    elif old_rolls is None or new_rolls is None:
+        old_rows = np.full(len(new_marks), -1)
+        added, removed = np.arange(len(new_marks)), np.arange(len(old_marks))
+    else:
+        old_keys = pd.Index(old_rolls[~old_missing])
+        first = ~old_keys.duplicated()
+        matched = old_keys[first].get_indexer(pd.Index(new_rolls))
+        old_rows = np.where(matched >= 0, np.flatnonzero(~old_missing)[first][matched], -1)
+        old_rows[new_missing] = -1
+        added = np.flatnonzero(old_rows < 0)
+        unmatched = np.ones(len(old_marks), dtype=bool)
+        unmatched[old_rows[old_rows >= 0]] = False
+        removed = np.flatnonzero(unmatched)
+
+    rows = np.flatnonzero(old_rows >= 0)
+    before, after = old_marks[old_rows[rows]], new_marks[rows]
+    differs = (before != after) & ~(np.isnan(before) & np.isnan(after))
+    changed = rows[differs]
+    return {'aligned': aligned, 'changed': changed, 'old_rows': old_rows[changed], 'old_marks': before[differs],
+            'new_marks': after[differs], 'added': added, 'removed': removed}
+
+
+def delta_size(delta):
+    return len(delta['changed']) + len(delta['added']) + len(delta['removed'])
+
+
+def reindex_marks(index, marks, delta):
+    # MarksIndex for reloaded marks: moves just the changed entries when the
+    # rows line up and few changed, otherwise sorts again.
+    if delta['aligned'] and index.order is not None and len(delta['changed']) <= max(len(index) // 100, 1000):
+        return index.with_changes(delta['changed'], delta['old_marks'], delta['new_marks'])
+    return MarksIndex(marks, with_order=index.order is not None)
+
+
+def roll_key(value):
+    # Roll numbers are matched as text; a numeric column read as floats
+    # (because of blanks) still matches the typed integer.
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value).strip()
+
+
+class StudentIndex:
+    # Per-student queries on a loaded dataset without scanning the frame:
+    # Roll No -> row through a dict, rank and percentile from the sorted
+    # marks, borderline and top-k students as slices of MarksIndex.order.
+    # Rows are positions in the frame the marks came from.
+    def __init__(self, marks, roll_numbers=None, marks_index=None):
+        self.marks = as_marks(marks)
+        if marks_index is None or marks_index.order is None:
+            marks_index = MarksIndex(self.marks, with_order=True)
+        self.index = marks_index
+
+        # Blank roll numbers are left out, so a file without them has an empty index.
+        self.rows = {}
+        if roll_numbers is not None:
+            import pandas as pd
+            roll_numbers = np.asarray(roll_numbers, dtype=object)
+            present = np.flatnonzero(~pd.isna(roll_numbers))
+            keys = [roll_key(roll) for roll in roll_numbers[present].tolist()]
+            # Built from the end, so the first row wins for a repeated roll number.
+            self.rows = dict(zip(reversed(keys), reversed(present.tolist())))
+
+    def with_marks(self, marks, marks_index):
+        # Same students (roll numbers in the same rows) with corrected marks.
+        index = copy.copy(self)
+        index.marks, index.index = as_marks(marks), marks_index
+        return index
+
+    def find(self, roll_number):
+        return self.rows.get(roll_key(roll_number))
+
+    def student(self, row, scheme=None):
+        mark = self.marks[row]
+        result = {'row': int(row), 'mark': None, 'rank': None, 'percentile': None}
+        if not np.isnan(mark):
+            result.update(mark=as_float(mark), rank=int(self.index.rank(mark)), percentile=self.index.percentile(mark))
+        if scheme is not None:
+            result['grade'] = scheme.categories[scheme.grade_codes(self.marks[row:row + 1])[0]]
+        return result
+
+    def lookup(self, roll_number, scheme=None):
+        # Mark, grade, rank and percentile of one student, or None if the roll number is unknown.
+        row = self.find(roll_number)
+        return None if row is None else self.student(row, scheme)
+
+    def borderline(self, scheme, margin=0.5):
+        # Students within margin marks of each cutoff between two grades.
+        cutoffs = []
+        for i in range(1, len(scheme.edges) - 1):
+            cutoff = float(scheme.edges[i])
+            cutoffs.append({'cutoff': cutoff, 'below': scheme.labels[i - 1], 'above': scheme.labels[i],
+                            'rows': self.index.rows_between(cutoff - margin, cutoff + margin)})
+        return cutoffs
+
+    def top(self, k):
+        return self.index.top_rows(k)
+
+
+def gap_value(below, above, decimals=2):
+    # Middle of the gap, with as few decimals (from `decimals` up) as keep it
+    # strictly inside the gap.
+    middle = (float(below) + float(above)) / 2
+    for places in range(decimals, decimals + 3):
+        rounded = round(middle, places)
+        if below < rounded < above:
+            return rounded
+    return middle
+
+
+class FineHistogram:
+    # Counts at a fixed resolution (0.1 marks by default), built once per
+    # dataset. Any coarser binning or grade-zone split is a difference of
+    # prefix sums over these counts, never another pass over the rows.
+    def __init__(self, marks, low=0.0, high=100.0, resolution=0.1):
+        marks = as_marks(marks)
+        marks = marks[~np.isnan(marks)]
+
+        self.low = low
+        self.resolution = resolution
+        self.bins = int(round((high - low) / resolution))
+        self.high = low + self.bins * resolution
+
+        # The small epsilon keeps marks like 0.3 (2.9999... steps) in their own
+        # bin; float32 marks need one scaled to their coarser rounding.
+        epsilon = max(1e-9, 4 * np.finfo(marks.dtype).eps * max(abs(low), abs(high)) / resolution)
+        index = np.floor((marks - low) / resolution + epsilon).astype(np.int64)
+        self.counts = np.bincount(np.clip(index, 0, self.bins - 1), minlength=self.bins)
+        self.cumulative = np.concatenate([[0], np.cumsum(self.counts)])
+
+        self.total = len(marks)
+        self.mean = float(marks.mean(dtype=np.float64)) if len(marks) else float('nan')
+
+    def edge_index(self, value):
+        index = np.floor((np.asarray(value, dtype=np.float64) - self.low) / self.resolution + 1e-9)
+        return np.clip(index, 0, self.bins).astype(np.int64)
+
+    def rebin(self, edges):
+        # Counts for [edges[i], edges[i + 1]), to the nearest resolution step.
+        return np.diff(self.cumulative[self.edge_index(edges)])
+
+    def count_between(self, lower, upper):
+        return int(self.rebin([lower, upper])[0])
+
+
+class GradeTally:
+    # Running totals for grading a file chunk by chunk: students per grade,
+    # counts over bin_edges (np.histogram binning, as MarksIndex.bin_counts)
+    # and the sum for the mean. Memory stays bounded by the chunk size.
+    def __init__(self, scheme, bin_edges=None):
+        if bin_edges is None:
+            bin_edges = scheme.edges[np.isfinite(scheme.edges)]
+        self.scheme = scheme
+        self.bin_edges = np.asarray(bin_edges, dtype=np.float64)
+        self.grade_counts = np.zeros(len(scheme.categories), dtype=np.int64)
+        self.bin_counts = np.zeros(max(len(self.bin_edges) - 1, 0), dtype=np.int64)
+        self.students = 0
+        self.marked = 0
+        self.total = 0.0
+
+    def add(self, marks):
+        marks = as_marks(marks)
+        codes = self.scheme.grade_codes(marks)
+        self.grade_counts += np.bincount(codes, minlength=len(self.grade_counts))
+
+        marks = marks[~np.isnan(marks)]
+        if len(self.bin_counts):
+            self.bin_counts += np.histogram(marks, bins=self.bin_edges.astype(marks.dtype))[0]
+        self.students += len(codes)
+        self.marked += len(marks)
+        self.total += float(marks.sum(dtype=np.float64))
+        return codes
+
+    @property
+    def mean(self):
+        return self.total / self.marked if self.marked else float('nan')
+
+    def distribution(self):
+        return dict(zip(self.scheme.categories, self.grade_counts.tolist()))
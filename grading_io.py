@@ -0,0 +1,601 @@
+import glob
+import importlib.util
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import repeat
+
+import numpy as np
+import pandas as pd
+
+MARKS_COLUMNS = ['SNo', 'Roll No', 'Name', 'Marks']
+MARKS_FILE_TYPES = ('.xlsx', '.xlsm', '.xls', '.csv', '.parquet')
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+HAS_CALAMINE = importlib.util.find_spec('python_calamine') is not None
+
+SIDECAR_DIR = '.grading_cache'
+
+EXPORT_FORMATS = {
+    'xlsx': ('Excel', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+    'csv': ('CSV', 'text/csv'),
+}
+if HAS_PYARROW:
+    EXPORT_FORMATS['parquet'] = ('Parquet', 'application/vnd.apache.parquet')
+
+EXPORT_CHUNK_ROWS = 10_000
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def iter_chunks(df, chunk_rows=EXPORT_CHUNK_ROWS, should_stop=None, progress=None):
+    # Slices of the frame for chunked writers, checking for cancellation
+    # before each slice and reporting the fraction of rows written after it.
+    total = len(df)
+    for start in range(0, total, chunk_rows):
+        if should_stop is not None and should_stop():
+            raise ExportCancelled()
+        yield df.iloc[start:start + chunk_rows]
+        if progress is not None:
+            progress(min(start + chunk_rows, total) / total)
+
+
+def widen_floats(df):
+    # float32 columns as the float64 values they print as (53.17, not
+    # 53.169998...), for writers that go through Python floats.
+    narrow = [col for col in df.columns if df[col].dtype == np.float32]
+    if not narrow:
+        return df
+    return df.assign(**{col: df[col].astype(str).astype(np.float64) for col in narrow})
+
+
+def iter_rows(chunks):
+    # Rows as plain Python values with NaN/NaT mapped to None, converted one
+    # chunk at a time so the object copy never covers the whole frame.
+    for chunk in chunks:
+        chunk = widen_floats(chunk).astype(object)
+        chunk = chunk.where(chunk.notna(), None)
+        yield from chunk.itertuples(index=False, name=None)
+
+
+def write_excel(df, target, sheet_name='Graded Results', should_stop=None, progress=None, split_by=None):
+    # openpyxl write-only workbooks stream rows to disk instead of keeping a
+    # cell object per value, so memory stays bounded for large cohorts.
+    # With split_by, each value of that column gets its own sheet.
+    from openpyxl import Workbook
+
+    if split_by is None:
+        parts = [(sheet_name, df)]
+    else:
+        parts = [(str(name)[:31], part.drop(columns=split_by)) for name, part in df.groupby(split_by, sort=False, observed=True)]
+
+    workbook = Workbook(write_only=True)
+    written = 0
+    for name, part in parts:
+        sheet = workbook.create_sheet(name)
+        sheet.append([str(col) for col in part.columns])
+        part_progress = None
+        if progress is not None:
+            part_progress = lambda fraction, offset=written, size=len(part): progress((offset + fraction * size) / len(df))
+        try:
+            for row in iter_rows(iter_chunks(part, should_stop=should_stop, progress=part_progress)):
+                sheet.append(row)
+        except ExportCancelled:
+            sheet.close()
+            raise
+        written += len(part)
+    workbook.save(target)
+
+
+def write_csv(df, target, should_stop=None, progress=None):
+    if isinstance(target, (str, os.PathLike)):
+        handle = open(target, 'w', encoding='utf-8', newline='')
+    else:
+        handle = io.TextIOWrapper(target, encoding='utf-8', newline='')
+    try:
+        for i, chunk in enumerate(iter_chunks(df, should_stop=should_stop, progress=progress)):
+            chunk.to_csv(handle, header=i == 0, index=False)
+        if len(df) == 0:
+            df.to_csv(handle, index=False)
+    finally:
+        if isinstance(target, (str, os.PathLike)):
+            handle.close()
+        else:
+            handle.flush()
+            handle.detach()
+
+
+def write_parquet(df, target, should_stop=None, progress=None):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.Schema.from_pandas(df, preserve_index=False)
+    with pq.ParquetWriter(target, schema) as writer:
+        for chunk in iter_chunks(df, should_stop=should_stop, progress=progress):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema, preserve_index=False))
+
+
+def write_frame(df, target, fmt, sheet_name='Graded Results', should_stop=None, progress=None, split_by=None):
+    # split_by only applies to xlsx; CSV and Parquet keep the column instead.
+    try:
+        if fmt == 'xlsx':
+            write_excel(df, target, sheet_name=sheet_name, should_stop=should_stop, progress=progress, split_by=split_by)
+        elif fmt == 'csv':
+            write_csv(df, target, should_stop=should_stop, progress=progress)
+        elif fmt == 'parquet':
+            write_parquet(df, target, should_stop=should_stop, progress=progress)
+        else:
+            raise ValueError(f"Unsupported export format: {fmt}")
+    except ExportCancelled:
+        if isinstance(target, (str, os.PathLike)) and os.path.exists(target):
+            os.remove(target)
+        raise
+
+
+def export_bytes(df, fmt, sheet_name='Graded Results', split_by=None):
+    output = io.BytesIO()
+    write_frame(df, output, fmt, sheet_name=sheet_name, split_by=split_by)
+    return output.getvalue()
+
+
+def detect_format(source, name=None):
+    name = name or (source if isinstance(source, (str, os.PathLike)) else getattr(source, 'name', ''))
+    extension = os.path.splitext(str(name))[1].lower()
+    if extension in ('.xlsx', '.xlsm'):
+        return 'xlsx'
+    if extension in ('.xls', '.csv', '.parquet'):
+        return extension[1:]
+
+    # Fall back to the file signature for uploads without a usable name.
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as handle:
+            head = handle.read(8)
+    else:
+        position = source.tell()
+        head = source.read(8)
+        source.seek(position)
+    if head.startswith(b'PK\x03\x04'):
+        return 'xlsx'
+    if head.startswith(b'PAR1'):
+        return 'parquet'
+    if head.startswith(b'\xd0\xcf\x11\xe0'):
+        return 'xls'
+    return 'csv'
+
+
+def compact_marks(df, downcast=True):
+    # About 20 bytes per student instead of ~150: float32 marks, the smallest
+    # integer type for serial numbers, and Arrow strings (categoricals without
+    # pyarrow) for names and roll numbers. Streamed chunks skip the integer
+    # downcast so every chunk has the same dtypes.
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if col == 'Marks' and values.dtype.kind in 'fiu':
+            columns[col] = values.astype(np.float32)
+        elif values.dtype.kind in 'iu' and downcast:
+            columns[col] = pd.to_numeric(values, downcast='integer')
+        elif values.dtype == object or pd.api.types.is_string_dtype(values.dtype):
+            if HAS_PYARROW:
+                columns[col] = values.astype('string[pyarrow]')
+            else:
+                # Categories would differ from chunk to chunk
+                columns[col] = values.astype('category' if downcast else 'string')
+    return df.assign(**columns) if columns else df
+
+
+def read_marks(source, name=None, fmt=None, sheet_name=0):
+    # Reads only the SNo/Roll No/Name/Marks columns that exist in the file,
+    # in the compact dtypes above. Callers check for the Marks column themselves.
+    fmt = fmt or detect_format(source, name)
+
+    if fmt == 'parquet':
+        import pyarrow.parquet as pq
+
+        columns = [col for col in pq.read_schema(source).names if col in MARKS_COLUMNS]
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        return compact_marks(pd.read_parquet(source, columns=columns))
+
+    if fmt == 'csv':
+        header = pd.read_csv(source, nrows=0).columns
+        if hasattr(source, 'seek'):
+            source.seek(0)
+        columns = [col for col in header if col in MARKS_COLUMNS]
+        return compact_marks(pd.read_csv(source, usecols=columns, engine='pyarrow' if HAS_PYARROW else 'c'))
+
+    engine = 'calamine' if HAS_CALAMINE else None
+    df = pd.read_excel(source, sheet_name=sheet_name, usecols=lambda col: col in MARKS_COLUMNS, engine=engine)
+    return compact_marks(df)
+
+
+def sidecar_prefix(file_path, sheet_name=0):
+    # Sheet names are hex-encoded so any name is a safe, unambiguous file name part.
+    directory, base = os.path.split(os.path.abspath(file_path))
+    sheet_tag = '' if sheet_name == 0 else f"@{str(sheet_name).encode('utf-8').hex()}"
+    return os.path.join(directory, SIDECAR_DIR, f"{base}{sheet_tag}.")
+
+
+def sidecar_path(file_path, sheet_name=0):
+    stat = os.stat(file_path)
+    return f"{sidecar_prefix(file_path, sheet_name)}{stat.st_size}-{stat.st_mtime_ns}.parquet"
+
+
+def load_marks_file(file_path, sheet_name=0):
+    # Repeat opens of an unchanged file are served from a Parquet sidecar
+    # keyed on size and mtime; a changed file gets a fresh sidecar.
+    if not HAS_PYARROW or detect_format(file_path) == 'parquet':
+        return read_marks(file_path, sheet_name=sheet_name)
+
+    sidecar = sidecar_path(file_path, sheet_name)
+    if os.path.exists(sidecar):
+        try:
+            return compact_marks(pd.read_parquet(sidecar))
+        except (OSError, ValueError):
+            pass
+
+    df = read_marks(file_path, sheet_name=sheet_name)
+    try:
+        os.makedirs(os.path.dirname(sidecar), exist_ok=True)
+        for stale in glob.glob(glob.escape(sidecar_prefix(file_path, sheet_name)) + '*-*.parquet'):
+            os.remove(stale)
+        df.to_parquet(sidecar, index=False)
+    except (OSError, ValueError, TypeError):
+        # Read-only directories and mixed-type columns just skip the cache.
+        pass
+    return df
+
+
+def list_sheets(source):
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    from openpyxl import load_workbook
+
+    workbook = load_workbook(source, read_only=True)
+    try:
+        return workbook.sheetnames
+    finally:
+        workbook.close()
+
+
+def read_sheet(source, sheet_name):
+    if isinstance(source, (str, os.PathLike)):
+        return load_marks_file(source, sheet_name)
+    if isinstance(source, bytes):
+        source = io.BytesIO(source)
+    return read_marks(source, fmt='xlsx', sheet_name=sheet_name)
+
+
+def load_sheets(source, sheet_names, max_workers=None):
+    # Each sheet is parsed in its own worker process, so a workbook with many
+    # sections loads in about the time of its largest sheet. Pass uploads as bytes.
+    sheet_names = list(sheet_names)
+    if len(sheet_names) == 1:
+        return {sheet_names[0]: read_sheet(source, sheet_names[0])}
+
+    workers = min(len(sheet_names), max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return dict(zip(sheet_names, executor.map(read_sheet, repeat(source), sheet_names)))
+
+
+def combine_sections(frames):
+    # One frame with a categorical Section column naming the source sheet.
+    combined = pd.concat([df.assign(Section=name) for name, df in frames.items()], ignore_index=True)
+    combined['Section'] = pd.Categorical(combined['Section'], categories=list(frames))
+    return combined
+
+
+def summarize_course(content, name):
+    # Sorted marks (with prefix sums) and 0.1-mark histogram of one course
+    # file: all the multi-course dashboard needs to regrade it.
+    from grading_core import FineHistogram, MarksIndex
+
+    df = read_marks(io.BytesIO(content), name=name)
+    if 'Marks' not in df.columns:
+        raise ValueError("The marks file must contain a 'Marks' column.")
+    marks = df['Marks'].to_numpy()
+    index = MarksIndex(marks)
+    index.prefix_sums()
+    high = max(100.0, float(np.ceil(index.sorted[-1]))) if len(index) else 100.0
+    return index, FineHistogram(marks, high=high)
+
+
+def load_courses(uploads, max_workers=None):
+    # {key: (content, name)} -> {key: (index, histogram)}, one file per worker
+    # process; a file that fails to parse maps to its exception instead.
+    results = {}
+    if len(uploads) <= 1:
+        for key, (content, name) in uploads.items():
+            try:
+                results[key] = summarize_course(content, name)
+            except Exception as e:
+                results[key] = e
+        return results
+
+    workers = min(len(uploads), max_workers or os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(summarize_course, content, name): key for key, (content, name) in uploads.items()}
+        for future in as_completed(futures):
+            try:
+                results[futures[future]] = future.result()
+            except Exception as e:
+                results[futures[future]] = e
+    return results
+
+
+# -----------------------------
+# Streaming (out-of-core) grading
+# -----------------------------
+STREAM_CHUNK_ROWS = 100_000
+
+# Excel sheets stop at 1,048,576 rows including the header.
+XLSX_MAX_ROWS = 1_048_575
+
+
+def iter_marks_chunks(source, fmt=None, chunk_rows=STREAM_CHUNK_ROWS, sheet_name=0):
+    # The marks columns in frames of at most chunk_rows rows: CSV chunks,
+    # Parquet record batches or openpyxl read-only rows. Only one chunk is
+    # in memory at a time.
+    fmt = fmt or detect_format(source)
+
+    if fmt == 'csv':
+        header = pd.read_csv(source, nrows=0).columns
+        columns = [col for col in header if col in MARKS_COLUMNS]
+        # Identifier columns are read as text so every chunk has the same dtypes.
+        dtypes = {col: str for col in columns if col in ('Roll No', 'Name')}
+        with pd.read_csv(source, usecols=columns, dtype=dtypes, chunksize=chunk_rows) as reader:
+            for chunk in reader:
+                yield compact_marks(chunk, downcast=False)
+
+    elif fmt == 'parquet':
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(source)
+        columns = [col for col in parquet_file.schema_arrow.names if col in MARKS_COLUMNS]
+        for batch in parquet_file.iter_batches(batch_size=chunk_rows, columns=columns):
+            yield compact_marks(batch.to_pandas(), downcast=False)
+
+    elif fmt == 'xlsx':
+        from openpyxl import load_workbook
+
+        workbook = load_workbook(source, read_only=True, data_only=True)
+        try:
+            sheet = workbook.worksheets[sheet_name] if isinstance(sheet_name, int) else workbook[sheet_name]
+            rows = sheet.iter_rows(values_only=True)
+            header = [str(col) if col is not None else '' for col in next(rows, ())]
+            keep = [i for i, col in enumerate(header) if col in MARKS_COLUMNS]
+            columns = [header[i] for i in keep]
+
+            batch = []
+            for row in rows:
+                # Read-only sheets return every row up to the stated
+                # dimension, including blank ones that are not students.
+                values = [row[i] if i < len(row) else None for i in keep]
+                if all(value is None for value in values):
+                    continue
+                batch.append(values)
+                if len(batch) == chunk_rows:
+                    yield excel_chunk(batch, columns)
+                    batch = []
+            if batch:
+                yield excel_chunk(batch, columns)
+        finally:
+            workbook.close()
+
+    else:
+        raise ValueError("Streaming works with xlsx, csv and parquet files.")
+
+
+def excel_chunk(rows, columns):
+    chunk = pd.DataFrame(rows, columns=columns)
+    if 'Marks' in chunk.columns:
+        chunk['Marks'] = pd.to_numeric(chunk['Marks'], errors='coerce')
+    for col in ('Roll No', 'Name'):
+        if col in chunk.columns:
+            chunk[col] = chunk[col].map(lambda value: None if value is None else str(value))
+    return compact_marks(chunk, downcast=False)
+
+
+def estimate_rows(source, fmt=None, sheet_name=0):
+    # Data rows in a marks file for streaming progress, without parsing it:
+    # CSV line count, Parquet metadata or the sheet's stated dimension, which
+    # can include trailing blank rows. None when it cannot be told.
+    fmt = fmt or detect_format(source)
+    try:
+        if fmt == 'csv':
+            lines = 0
+            with open(source, 'rb') as handle:
+                for block in iter(lambda: handle.read(1 << 20), b''):
+                    lines += block.count(b'\n')
+            return max(lines - 1, 0)
+        if fmt == 'parquet':
+            import pyarrow.parquet as pq
+            return pq.ParquetFile(source).metadata.num_rows
+        if fmt == 'xlsx':
+            from openpyxl import load_workbook
+            workbook = load_workbook(source, read_only=True)
+            try:
+                sheet = workbook.worksheets[sheet_name] if isinstance(sheet_name, int) else workbook[sheet_name]
+                return None if sheet.max_row is None else max(sheet.max_row - 1, 0)
+            finally:
+                workbook.close()
+    except (OSError, ValueError, KeyError, IndexError):
+        return None
+    return None
+
+
+class ChunkWriter:
+    # Writes graded chunks as they arrive. xlsx uses a write-only workbook and
+    # continues on a new sheet at Excel's row limit; Parquet and CSV append.
+    # Later chunks are cast to the first chunk's dtypes; an integer column
+    # that turns up blanks later is widened instead (see conform).
+    def __init__(self, target, fmt, sheet_name='Graded Results'):
+        if fmt not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {fmt}")
+        self.target = target
+        self.fmt = fmt
+        self.sheet_name = sheet_name
+        self.dtypes = None
+        self.handle = None
+        self.rows = 0
+
+    def write(self, chunk):
+        if self.dtypes is None:
+            self.dtypes = chunk.dtypes
+            self.open(chunk)
+        else:
+            chunk = self.conform(chunk)
+
+        if self.fmt == 'csv':
+            chunk.to_csv(self.handle, header=self.rows == 0, index=False)
+        elif self.fmt == 'parquet':
+            import pyarrow as pa
+
+            self.handle.write_table(pa.Table.from_pandas(chunk, schema=self.handle.schema, preserve_index=False))
+        else:
+            for row in iter_rows([chunk]):
+                if self.sheet_rows == XLSX_MAX_ROWS:
+                    self.new_sheet(chunk.columns)
+                self.sheet.append(row)
+                self.sheet_rows += 1
+        self.rows += len(chunk)
+
+    def conform(self, chunk):
+        # An integer column (SNo) that reads as float in this chunk stays a
+        # nullable integer if it only gained blanks, and becomes float if it
+        # has fractions, for the rest of the file. Parquet columns are
+        # nullable, so blanks still fit the schema.
+        for col, dtype in self.dtypes.items():
+            values = chunk[col]
+            if dtype.kind in 'iu' and values.dtype.kind == 'f':
+                present = values.dropna()
+                if not (present == np.floor(present)).all():
+                    self.dtypes[col] = np.dtype(np.float64)
+                elif len(present) < len(values):
+                    self.dtypes[col] = pd.Int64Dtype()
+        return chunk.astype(self.dtypes)
+
+    def open(self, chunk):
+        if self.fmt == 'csv':
+            self.handle = open(self.target, 'w', encoding='utf-8', newline='')
+        elif self.fmt == 'parquet':
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+
+            self.handle = pq.ParquetWriter(self.target, pa.Schema.from_pandas(chunk, preserve_index=False))
+        else:
+            from openpyxl import Workbook
+
+            self.handle = Workbook(write_only=True)
+            self.sheets = 0
+            self.new_sheet(chunk.columns)
+
+    def new_sheet(self, columns):
+        self.sheets += 1
+        name = self.sheet_name if self.sheets == 1 else f"{self.sheet_name} {self.sheets}"
+        self.sheet = self.handle.create_sheet(name[:31])
+        self.sheet.append([str(col) for col in columns])
+        self.sheet_rows = 0
+
+    def close(self):
+        if self.handle is None:
+            return
+        if self.fmt == 'xlsx':
+            self.handle.save(self.target)
+        else:
+            self.handle.close()
+        self.handle = None
+
+    def discard(self):
+        # Drops a partly written file after an error or cancel.
+        if self.dtypes is None:
+            return
+        if self.handle is not None and self.fmt == 'xlsx':
+            self.sheet.close()
+            self.handle = None
+        self.close()
+        if os.path.exists(self.target):
+            os.remove(self.target)
+
+
+def stream_grade(source, scheme, target, fmt, bin_edges=None, chunk_rows=STREAM_CHUNK_ROWS, sheet_name=0,
+                 should_stop=None, progress=None):
+    # Grades a marks file chunk by chunk, writing each graded chunk straight to
+    # target and returning the GradeTally (per-grade totals, bin counts, mean).
+    # progress is called with the number of rows graded so far.
+    from grading_core import GradeTally
+
+    tally = GradeTally(scheme, bin_edges)
+    writer = ChunkWriter(target, fmt)
+    try:
+        for chunk in iter_marks_chunks(source, chunk_rows=chunk_rows, sheet_name=sheet_name):
+            if should_stop is not None and should_stop():
+                raise ExportCancelled()
+            if 'Marks' not in chunk.columns:
+                raise ValueError("The marks file must contain a 'Marks' column.")
+            codes = tally.add(chunk['Marks'].to_numpy())
+            writer.write(chunk.assign(Grade=pd.Categorical.from_codes(codes, categories=scheme.categories)))
+            if progress is not None:
+                progress(tally.students)
+        if writer.handle is None:
+            raise ValueError("The marks file has no rows.")
+        writer.close()
+    except BaseException:
+        writer.discard()
+        raise
+    return tally
+
+
+# -----------------------------
+# Watch mode
+# -----------------------------
+def file_signature(path):
+    # Size and mtime; a changed signature means the file was saved again.
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def settled_signature(path, settle=0.2):
+    # The signature once the file has stopped changing for `settle` seconds,
+    # or None while a save is still being written.
+    before = file_signature(path)
+    time.sleep(settle)
+    after = file_signature(path)
+    return after if after == before else None
+
+
+def delta_frame(old_df, new_df, delta, scheme):
+    # The students a reload changed, with marks and grades before and after.
+    keys = [col for col in ['Roll No', 'Name', 'Section'] if col in new_df.columns]
+    old_marks = np.concatenate([delta['old_marks'], np.full(len(delta['added']), np.nan),
+                                old_df['Marks'].to_numpy()[delta['removed']]])
+    new_marks = np.concatenate([delta['new_marks'], new_df['Marks'].to_numpy()[delta['added']],
+                                np.full(len(delta['removed']), np.nan)])
+    frame = pd.concat([new_df.iloc[delta['changed']][keys], new_df.iloc[delta['added']][keys],
+                       old_df.iloc[delta['removed']][[col for col in keys if col in old_df.columns]]], ignore_index=True)
+    old_grades = np.asarray(scheme.categories, dtype=object)[scheme.grade_codes(old_marks)]
+    new_grades = np.asarray(scheme.categories, dtype=object)[scheme.grade_codes(new_marks)]
+    old_grades[len(delta['changed']):len(delta['changed']) + len(delta['added'])] = None
+    new_grades[len(delta['changed']) + len(delta['added']):] = None
+    return widen_floats(frame.assign(**{
+        'Old Marks': old_marks.astype(new_df['Marks'].dtype), 'Marks': new_marks.astype(new_df['Marks'].dtype),
+        'Old Grade': old_grades, 'Grade': new_grades,
+        'Change': ['changed'] * len(delta['changed']) + ['added'] * len(delta['added']) + ['removed'] * len(delta['removed']),
+    }))
+
+
+def delta_path(output_file):
+    # graded.xlsx -> graded_delta_20240501-143000.xlsx, numbered if that exists.
+    stem, ext = os.path.splitext(output_file)
+    stamp = time.strftime('%Y%m%d-%H%M%S')
+    path, number = f"{stem}_delta_{stamp}{ext}", 1
+    while os.path.exists(path):
+        number += 1
+        path = f"{stem}_delta_{stamp}-{number}{ext}"
+    return path
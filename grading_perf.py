@@ -0,0 +1,77 @@
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from functools import wraps
+
+import numpy as np
+
+
+class StageTimer:
+    # Rolling per-stage latencies for the UIs. Keeps the last `window`
+    # samples of each stage for p50/p95 and a bounded event log that can be
+    # dumped as a Chrome/Perfetto trace (chrome://tracing, ui.perfetto.dev).
+    def __init__(self, window=200, max_events=20_000):
+        self.window = window
+        self.samples = {}
+        self.events = deque(maxlen=max_events)
+        self.origin = time.perf_counter()
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, start, time.perf_counter())
+
+    def timed(self, name):
+        def decorator(func):
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.stage(name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def record(self, name, start, end):
+        duration_ms = (end - start) * 1000
+        with self.lock:
+            self.samples.setdefault(name, deque(maxlen=self.window)).append(duration_ms)
+            self.events.append({
+                'name': name, 'ph': 'X', 'pid': 0, 'tid': threading.get_ident(),
+                'ts': round((start - self.origin) * 1e6, 1), 'dur': round(duration_ms * 1000, 1),
+            })
+
+    def stats(self):
+        with self.lock:
+            samples = {name: np.fromiter(values, dtype=float) for name, values in self.samples.items()}
+        return {
+            name: {
+                'count': len(values),
+                'last_ms': float(values[-1]),
+                'p50_ms': float(np.percentile(values, 50)),
+                'p95_ms': float(np.percentile(values, 95)),
+            }
+            for name, values in samples.items() if len(values)
+        }
+
+    def summary_lines(self):
+        return [f"{name:<18} p50 {stat['p50_ms']:7.2f} ms   p95 {stat['p95_ms']:7.2f} ms"
+                for name, stat in sorted(self.stats().items())]
+
+    def trace_json(self):
+        with self.lock:
+            events = list(self.events)
+        return json.dumps({'traceEvents': events, 'displayTimeUnit': 'ms', 'stats': self.stats()}, indent=1)
+
+    def dump(self, path):
+        with open(path, 'w', encoding='utf-8') as handle:
+            handle.write(self.trace_json())
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
+            self.events.clear()
@@ -0,0 +1,254 @@
+# Grading HTTP API for multi-user deployments. A plain WSGI app: gunicorn
+# serves it in production (see Procfile), `python server.py` runs it locally.
+#
+#   POST /marks?name=marks.xlsx[&sheet=Sec+A]   body: the marks file
+#   POST /grade    {"file_hash": ..., "cutoffs": {"A": 85, ...}}    distribution and stats
+#                  {"file_hash": ..., "handles": [0, 15, ...], "max_marks": 100, "offset": 0, "limit": 50}
+#   POST /export   {"file_hash": ..., "cutoffs": {...}, "format": "xlsx"}   graded file
+#   GET  /health
+#
+# Parsing and export run in a process pool, so one slow workbook does not
+# hold up other instructors. Parsed marks, grade results and exports live in
+# a bounded in-memory LRU cache keyed by the upload's content hash; an evicted
+# file answers 404 and the client uploads it again.
+import argparse
+import hashlib
+import json
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from urllib.parse import parse_qs
+
+import numpy as np
+
+from grading_core import DEFAULT_CUTOFFS, GradingScheme, LRUCache, MarksIndex
+from grading_io import EXPORT_FORMATS, export_bytes, read_marks, widen_floats
+
+MAX_UPLOAD_BYTES = int(os.environ.get('GRADING_MAX_UPLOAD_MB', 50)) * 2**20
+CACHE_ENTRIES = int(os.environ.get('GRADING_CACHE_ENTRIES', 256))
+WORKERS = int(os.environ.get('GRADING_WORKERS', os.cpu_count() or 1))
+MAX_PAGE_ROWS = 10_000
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class Dataset:
+    # One parsed upload: the marks frame sorted high to low, as app.py shows it,
+    # and a sorted index for distribution queries.
+    def __init__(self, df):
+        self.df = df.sort_values(by='Marks', ascending=False).reset_index(drop=True)
+        self.index = MarksIndex(self.df['Marks'].to_numpy())
+
+
+cache = LRUCache(CACHE_ENTRIES)
+executor = None
+executor_lock = threading.Lock()
+
+
+def get_executor():
+    # Created on first use so every gunicorn worker gets its own pool after forking.
+    global executor
+    with executor_lock:
+        if executor is None:
+            executor = ProcessPoolExecutor(max_workers=WORKERS)
+        return executor
+
+
+# -----------------------------
+# Pool jobs
+# -----------------------------
+def parse_marks(content, name, sheet):
+    df = read_marks(BytesIO(content), name=name, sheet_name=sheet if sheet is not None else 0)
+    if 'Marks' not in df.columns:
+        raise ValueError("The marks file must contain a 'Marks' column.")
+    return df
+
+
+def grade_and_export(df, scheme, fmt):
+    return export_bytes(df.assign(Grade=scheme.grade(df['Marks'])), fmt)
+
+
+# -----------------------------
+# Request handling
+# -----------------------------
+def read_body(environ):
+    try:
+        length = int(environ.get('CONTENT_LENGTH') or 0)
+    except ValueError:
+        raise HTTPError('400 Bad Request', "Invalid Content-Length.")
+    if length > MAX_UPLOAD_BYTES:
+        raise HTTPError('413 Request Entity Too Large', f"Uploads are limited to {MAX_UPLOAD_BYTES // 2**20} MB.")
+    return environ['wsgi.input'].read(length) if length else b''
+
+
+def read_json(environ):
+    try:
+        payload = json.loads(read_body(environ) or b'{}')
+    except ValueError:
+        raise HTTPError('400 Bad Request', "The request body must be JSON.")
+    if not isinstance(payload, dict):
+        raise HTTPError('400 Bad Request', "The request body must be a JSON object.")
+    return payload
+
+
+def scheme_from(payload):
+    try:
+        if 'handles' in payload:
+            handles = [float(value) for value in payload['handles']]
+            if len(handles) != 9:
+                raise ValueError("handles needs nine values.")
+            return GradingScheme.from_handles(handles, float(payload.get('max_marks', 100)))
+        cutoffs = payload.get('cutoffs', DEFAULT_CUTOFFS)
+        return GradingScheme.from_cutoffs({str(grade): float(value) for grade, value in cutoffs.items()})
+    except (TypeError, ValueError, AttributeError) as e:
+        raise HTTPError('400 Bad Request', f"Invalid boundaries: {e}")
+
+
+def dataset_for(payload):
+    dataset = cache.get(('marks', payload.get('file_hash')))
+    if dataset is None:
+        raise HTTPError('404 Not Found', "Unknown file_hash; upload the marks file again.")
+    return dataset
+
+
+def upload_marks(environ):
+    content = read_body(environ)
+    if not content:
+        raise HTTPError('400 Bad Request', "Send the marks file as the request body.")
+    query = parse_qs(environ.get('QUERY_STRING', ''))
+    name = query.get('name', [''])[0]
+    sheet = query.get('sheet', [None])[0]
+
+    file_hash = hashlib.sha256(content).hexdigest()
+    if sheet is not None:
+        file_hash = hashlib.sha256(f"{file_hash}:{sheet}".encode('utf-8')).hexdigest()
+    dataset = cache.get(('marks', file_hash))
+    if dataset is None:
+        try:
+            df = get_executor().submit(parse_marks, content, name, sheet).result()
+        except Exception as e:
+            raise HTTPError('400 Bad Request', f"Could not read the marks file: {e}")
+        dataset = cache.put(('marks', file_hash), Dataset(df))
+    return {'file_hash': file_hash, 'students': len(dataset.df), 'columns': list(dataset.df.columns)}
+
+
+def grade(environ):
+    payload = read_json(environ)
+    dataset = dataset_for(payload)
+    scheme = scheme_from(payload)
+
+    key = ('grade', payload['file_hash'], scheme.key)
+    result = cache.get(key)
+    if result is None:
+        # Lookups into the sorted marks and their prefix sums, no pass over the rows.
+        stats = dataset.index.grade_stats(scheme)
+        summary = dataset.index.summary()
+        result = cache.put(key, {
+            'file_hash': payload['file_hash'],
+            'boundaries': [edge if np.isfinite(edge) else None for edge in scheme.boundaries],
+            'students': len(dataset.df),
+            'mean': summary['mean'] if summary['students'] else None,
+            'median': summary['median'] if summary['students'] else None,
+            'std': summary['std'] if summary['students'] else None,
+            'distribution': {grade.strip(): int(count) for grade, count in zip(scheme.categories, stats['counts'])},
+            'percentages': {grade.strip(): round(float(share), 2) for grade, share in zip(scheme.categories, stats['percentages'])},
+            'grade_means': {grade.strip(): None if np.isnan(mean) else round(float(mean), 2)
+                            for grade, mean in zip(scheme.categories, stats['means'])},
+        })
+
+    if 'limit' not in payload:
+        return result
+    # One page of graded rows, highest marks first.
+    try:
+        offset, limit = int(payload.get('offset', 0)), min(int(payload['limit']), MAX_PAGE_ROWS)
+    except (TypeError, ValueError):
+        raise HTTPError('400 Bad Request', "offset and limit must be integers.")
+    page = dataset.df.iloc[max(offset, 0):max(offset, 0) + max(limit, 0)]
+    page = widen_floats(page.assign(Grade=[grade.strip() for grade in scheme.grade(page['Marks'])])).astype(object)
+    rows = page.where(page.notna(), None).to_dict(orient='records')
+    return dict(result, offset=offset, rows=rows)
+
+
+def export(environ):
+    payload = read_json(environ)
+    dataset = dataset_for(payload)
+    scheme = scheme_from(payload)
+    fmt = payload.get('format', 'xlsx')
+    if fmt not in EXPORT_FORMATS:
+        raise HTTPError('400 Bad Request', f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+
+    key = ('export', payload['file_hash'], scheme.key, fmt)
+    data = cache.get(key)
+    if data is None:
+        data = cache.put(key, get_executor().submit(grade_and_export, dataset.df, scheme, fmt).result())
+    return data, [('Content-Type', EXPORT_FORMATS[fmt][1]),
+                  ('Content-Disposition', f'attachment; filename="graded_output_with_grades.{fmt}"')]
+
+
+ROUTES = {
+    ('GET', '/health'): lambda environ: {'status': 'ok', 'workers': WORKERS, 'cache': cache.stats()},
+    ('POST', '/marks'): upload_marks,
+    ('POST', '/grade'): grade,
+    ('POST', '/export'): export,
+}
+
+
+def app(environ, start_response):
+    method, path = environ['REQUEST_METHOD'], environ.get('PATH_INFO', '/').rstrip('/') or '/'
+    try:
+        handler = ROUTES.get((method, path))
+        if handler is None:
+            if any(route_path == path for _, route_path in ROUTES):
+                raise HTTPError('405 Method Not Allowed', f"{method} is not supported on {path}.")
+            raise HTTPError('404 Not Found', f"No such endpoint: {path}")
+        result = handler(environ)
+        status = '200 OK'
+    except HTTPError as e:
+        status, result = e.status, {'error': str(e)}
+    except Exception as e:
+        status, result = '500 Internal Server Error', {'error': str(e)}
+
+    if isinstance(result, tuple):
+        body, headers = result
+    else:
+        body, headers = json.dumps(result).encode('utf-8'), [('Content-Type', 'application/json')]
+    start_response(status, headers + [('Content-Length', str(len(body)))])
+    return [body]
+
+
+def main():
+    from socketserver import ThreadingMixIn
+    from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+    class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+        daemon_threads = True
+
+    class QuietHandler(WSGIRequestHandler):
+        def log_message(self, *args):
+            pass
+
+    parser = argparse.ArgumentParser(description="Run the grading API without gunicorn.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=int(os.environ.get('PORT', 8000)))
+    parser.add_argument('--quiet', action='store_true', help="Don't log every request.")
+    args = parser.parse_args()
+
+    server = make_server(args.host, args.port, app, server_class=ThreadingWSGIServer,
+                         handler_class=QuietHandler if args.quiet else WSGIRequestHandler)
+    print(f"Grading API on http://{args.host}:{args.port} ({WORKERS} pool workers)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+if __name__ == '__main__':
+    main()